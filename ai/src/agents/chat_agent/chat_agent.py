@@ -1,31 +1,50 @@
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END, add_messages
 from langchain_core.messages import HumanMessage, ToolMessage, SystemMessage, AIMessage
-from langchain_groq import ChatGroq
-from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+import asyncio
+import functools
 import json
+import uuid
 
 # Import the agents
 from agents.chat_agent.tools.rag_tool import get_relevant_contexts
+from agents.chat_agent.query_prefilter import prevalidate_query, ACCEPT, REJECT
 from langsmith import traceable
+from cofig import server_config
+from core.model.model import get_chat_model, get_structured_llm
+from core.model.hedging import resilient_ainvoke
+from core.single_flight import SingleFlight
+from core.metrics import instrument_node
+from core.logger import get_logger
+from core.deadline import (
+    DeadlineExceeded,
+    new_deadline,
+    request_deadline,
+    with_deadline,
+)
 
 
 # -------------------------------
 #  Environment & Model Setup
 # -------------------------------
-load_dotenv()
+logger = get_logger("chat_agent")
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2,
-)
+CHAT_MODEL = "llama-3.1-8b-instant"
 
-# Bind tools to the LLM
 tools = [get_relevant_contexts]
-llm_with_tools = llm.bind_tools(tools=tools)
+
+
+@functools.cache
+def get_llm():
+    """Chat model client, created on first use (or during app startup)."""
+    return get_chat_model(model=CHAT_MODEL, temperature=0)
+
+
+@functools.cache
+def get_llm_with_tools():
+    """Chat model with the RAG tool bound."""
+    return get_llm().bind_tools(tools=tools)
 
 
 # -------------------------------
@@ -74,6 +93,33 @@ No explanations. Only output "YES" or "NO".
 )
 
 
+query_triage_message = SystemMessage(
+    content="""
+You are the triage step of a clinical medical assistant supporting a doctor.
+
+For the doctor's latest query decide:
+1. is_valid — true if the query relates to health, medicine, a patient, a diagnosis, symptoms, medical history, treatment, or clinical information, even if phrased simply (e.g., "Patient complaint?", "Does the patient smoke?"). false ONLY if it contains sexual or explicit content, offensive or violent language, or is completely unrelated to health, patients, or medicine.
+2. needs_retrieval — true if answering requires details from the patient's consultation transcript (history, symptoms, findings, medications, what was said). Almost every patient-specific question needs retrieval.
+3. retrieval_query — a concise search query for the transcript when needs_retrieval is true, otherwise an empty string.
+"""
+)
+
+
+class QueryTriage(BaseModel):
+    """Fused validation and tool-selection result for a chat query."""
+
+    is_valid: bool = Field(description="Whether the query is appropriate to process")
+    needs_retrieval: bool = Field(
+        description="Whether patient transcript context must be retrieved"
+    )
+    retrieval_query: str = Field(
+        default="", description="Search query for the transcript retrieval tool"
+    )
+
+
+REFUSAL_MESSAGE = "I'm sorry, I cannot assist with that request because it is inappropriate or violates the platform guidelines."
+
+
 # -------------------------------
 # State Definition
 # -------------------------------
@@ -81,15 +127,29 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
     context: list[str]
     session_id: str
+    deadline: float  # time.monotonic() budget end set by the API layer
 
 
 # -------------------------------
 # Query Validator Node
 # -------------------------------
 @traceable
-def query_validator(state: State):
+async def query_validator(state: State):
     """Validates the user query to ensure it's appropriate for processing."""
-    response = llm.invoke([query_validator_message] + state["messages"])
+    if server_config["query_prefilter"]:
+        decision = prevalidate_query(state["messages"][-1].content)
+        if decision == ACCEPT:
+            return {"messages": [AIMessage(content="YES")]}
+        if decision == REJECT:
+            return {"messages": [AIMessage(content="NO")]}
+
+    response = await with_deadline(
+        "query_validator",
+        state.get("deadline"),
+        resilient_ainvoke(
+            CHAT_MODEL, get_llm(), [query_validator_message] + state["messages"]
+        ),
+    )
     return {"messages": [response]}
 
 
@@ -109,11 +169,17 @@ def query_validator_router(state: State):
 #  Chatbot Node
 # -------------------------------
 @traceable
-def chatbot(state: State):
+async def chatbot(state: State):
     """Primary chatbot node that invokes the LLM with tools."""
     # remove the last message (the NO/YES message)
     state["messages"] = state["messages"][:-1]
-    ai_message = llm_with_tools.invoke([system_message] + state["messages"])
+    ai_message = await with_deadline(
+        "chatbot",
+        state.get("deadline"),
+        resilient_ainvoke(
+            CHAT_MODEL, get_llm_with_tools(), [system_message] + state["messages"]
+        ),
+    )
     return {"messages": [ai_message]}
 
 
@@ -145,13 +211,43 @@ def tools_router(state: State):
 # -------------------------------
 #  Tool Node (Handles RAG Tool)
 # -------------------------------
+def _retrieval_deadline(deadline: float | None) -> float:
+    """
+    Retrieval may use at most retrieval_seconds, and never the
+    answer_reserve_seconds of the request budget kept for the answer call.
+    """
+    settings = server_config["deadlines"]
+    retrieval_deadline = new_deadline(settings["retrieval_seconds"])
+    if deadline is None:
+        return retrieval_deadline
+    return min(retrieval_deadline, deadline - settings["answer_reserve_seconds"])
+
+
+async def _retrieve(query: str, state: State) -> list[str]:
+    """
+    Runs the RAG tool within its share of the request deadline. When that
+    runs out the answer is degraded to one without retrieved context.
+    """
+    try:
+        return await with_deadline(
+            "rag_retrieval",
+            _retrieval_deadline(state.get("deadline")),
+            get_relevant_contexts.ainvoke(
+                {"query": query, "session_id": state["session_id"]}
+            ),
+        )
+    except DeadlineExceeded:
+        logger.warning("⚠️ Retrieval timed out. Answering without patient context.")
+        return []
+
+
 @traceable
-def tool_node_fn(state: State):
+async def tool_node_fn(state: State):
     """Handles the execution of the get_relevant_contexts tool."""
 
     # Avoid duplicate tool calls if context already loaded
     if state.get("context") and len(state["context"]) > 0:
-        print("⚠️ Context already exists. Skipping tool call.")
+        logger.warning("⚠️ Context already exists. Skipping tool call.")
         return {"messages": []}
 
     last_message = state["messages"][-1]
@@ -162,9 +258,7 @@ def tool_node_fn(state: State):
         query = tool_call["args"]["query"]
 
         # Proper invocation
-        result = get_relevant_contexts.invoke(
-            {"query": query, "session_id": state["session_id"]}
-        )
+        result = await _retrieve(query, state)
 
         # Cache retrieved context
         state["context"] = result
@@ -184,63 +278,297 @@ def tool_node_fn(state: State):
 #  Answer Using Context Node
 # -------------------------------
 @traceable
-def answer_using_context_node(state: State):
+async def answer_using_context_node(state: State):
     """Generates the final answer using the retrieved context by the tools"""
-    print("current state:", state)
+    logger.debug(
+        "Answering with %d messages and %d context chunks",
+        len(state["messages"]),
+        len(state["context"]),
+    )
     state["messages"].append(
         SystemMessage(content=f"Relevant patient context:\n{state['context']}")
     )
-    answer = llm.invoke(state["messages"])
+    answer = await with_deadline(
+        "answer_using_context_node",
+        state.get("deadline"),
+        resilient_ainvoke(CHAT_MODEL, get_llm(), state["messages"]),
+    )
     return {"messages": [answer]}
 
 
+# -------------------------------
+#  Speculative Node (Validation ∥ Tool Decision ∥ Retrieval)
+# -------------------------------
+async def _cancel(*tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _accepted():
+    return AIMessage(content="YES")
+
+
+@traceable
+async def speculative_node(state: State):
+    """
+    Runs query validation, the tool decision and RAG retrieval for the raw
+    query concurrently. In-flight work is cancelled if validation says NO;
+    otherwise the speculative context is handed to answer_using_context_node.
+    Validation is answered locally when the query prefilter is confident.
+    """
+    messages = state["messages"]
+
+    prefilter_decision = None
+    if server_config["query_prefilter"]:
+        prefilter_decision = prevalidate_query(messages[-1].content)
+        if prefilter_decision == REJECT:
+            return {"messages": [AIMessage(content="NO")]}
+
+    if prefilter_decision == ACCEPT:
+        validation = asyncio.create_task(_accepted())
+    else:
+        validation = asyncio.create_task(
+            with_deadline(
+                "query_validator",
+                state.get("deadline"),
+                resilient_ainvoke(
+                    CHAT_MODEL, get_llm(), [query_validator_message] + messages
+                ),
+            )
+        )
+    decision = asyncio.create_task(
+        with_deadline(
+            "chatbot",
+            state.get("deadline"),
+            resilient_ainvoke(
+                CHAT_MODEL, get_llm_with_tools(), [system_message] + messages
+            ),
+        )
+    )
+    retrieval = asyncio.create_task(_retrieve(messages[-1].content, state))
+
+    try:
+        verdict = await validation
+        if verdict.content.strip().upper() == "NO":
+            await _cancel(decision, retrieval)
+            return {"messages": [verdict]}
+
+        ai_message = await decision
+        if not getattr(ai_message, "tool_calls", None):
+            await _cancel(retrieval)
+            return {"messages": [ai_message]}
+
+        result = await retrieval
+    except BaseException:
+        await _cancel(validation, decision, retrieval)
+        raise
+
+    tool_message = ToolMessage(
+        content=json.dumps(result, indent=2),
+        name="get_relevant_contexts",
+        tool_call_id=ai_message.tool_calls[0]["id"],
+    )
+    return {"messages": [ai_message, tool_message], "context": result}
+
+
+@traceable
+def speculative_router(state: State):
+    """Answers from context if retrieval ran, otherwise ends (refusal or reply)."""
+    if isinstance(state["messages"][-1], ToolMessage):
+        return "answer_using_context_node"
+    return END
+
+
+# -------------------------------
+#  Query Triage Node (Fused Validation + Tool Selection)
+# -------------------------------
+@traceable
+async def query_triage(state: State):
+    """
+    Validates the query and decides on retrieval in a single structured call.
+    Emits the same messages the serial graph would produce so the existing
+    routers apply: "NO" to end, a get_relevant_contexts tool call to
+    retrieve, or "YES" to fall back to the chatbot node.
+    """
+    triage_llm = get_structured_llm(QueryTriage, model=CHAT_MODEL, temperature=0)
+    triage = await with_deadline(
+        "query_triage",
+        state.get("deadline"),
+        resilient_ainvoke(
+            CHAT_MODEL, triage_llm, [query_triage_message] + state["messages"]
+        ),
+    )
+
+    if not triage.is_valid:
+        return {"messages": [AIMessage(content="NO")]}
+
+    if triage.needs_retrieval:
+        tool_call = {
+            "name": "get_relevant_contexts",
+            "args": {"query": triage.retrieval_query or state["messages"][-1].content},
+            "id": f"call_{uuid.uuid4().hex}",
+        }
+        return {"messages": [AIMessage(content="", tool_calls=[tool_call])]}
+
+    return {"messages": [AIMessage(content="YES")]}
+
+
+@traceable
+def query_triage_router(state: State):
+    """Routes tool calls via tools_router, everything else via query_validator_router."""
+    if getattr(state["messages"][-1], "tool_calls", None):
+        return tools_router(state)
+    return query_validator_router(state)
+
+
 # -------------------------------
 #  Graph Definition
 # -------------------------------
-graph = StateGraph(State)
+def build_chat_graph(mode: str = "serial"):
+    """
+    Builds the chat agent graph.
+    - "serial": query_validator → chatbot → tool_node → answer_using_context_node
+    - "speculative": speculative_node → answer_using_context_node
+    - "fused": query_triage → tool_node → answer_using_context_node
+    """
+    graph = StateGraph(State)
+
+    def add_node(name, node):
+        graph.add_node(name, instrument_node("chat", name, node))
+
+    add_node("answer_using_context_node", answer_using_context_node)
+    graph.add_edge("answer_using_context_node", END)
+
+    if mode == "speculative":
+        add_node("speculative_node", speculative_node)
+        graph.set_entry_point("speculative_node")
+        graph.add_conditional_edges("speculative_node", speculative_router)
+        return graph.compile()
+
+    # Add nodes
+    add_node("chatbot", chatbot)
+    add_node("tool_node", tool_node_fn)
+
+    if mode == "fused":
+        add_node("query_triage", query_triage)
+        graph.set_entry_point("query_triage")
+        graph.add_conditional_edges("query_triage", query_triage_router)
+    else:
+        add_node("query_validator", query_validator)
+        graph.set_entry_point("query_validator")
+        graph.add_conditional_edges("query_validator", query_validator_router)
 
-# Add nodes
-graph.add_node("query_validator", query_validator)
-graph.add_node("chatbot", chatbot)
-graph.add_node("tool_node", tool_node_fn)
-graph.add_node("answer_using_context_node", answer_using_context_node)
+    # Define graph flow
+    graph.add_conditional_edges("chatbot", tools_router)
+    graph.add_edge("tool_node", "answer_using_context_node")
 
-# Define graph flow
-graph.set_entry_point("query_validator")
-graph.add_conditional_edges("query_validator", query_validator_router)
-graph.add_conditional_edges("chatbot", tools_router)
-graph.add_edge("tool_node", "answer_using_context_node")
-graph.add_edge("answer_using_context_node", END)
+    return graph.compile()
 
-# Compile the chat agent
-chat_app = graph.compile()
+
+@functools.cache
+def get_chat_app():
+    """Compiled chat graph for the configured pipeline, built once per worker."""
+    return build_chat_graph(server_config["chat_pipeline"])
+
+
+chat_requests = SingleFlight()
 
 
 # -------------------------------
 #  Public Interface Function
 # -------------------------------
 @traceable
-def invoke_chat_agent(query: str, session_id: str):
+async def invoke_chat_agent(query: str, session_id: str, deadline: float = None):
     """
     Invokes the full chat agent pipeline:
     1. Adds the system and user messages
     2. Passes session info
     3. Uses cached or retrieved context
     4. Returns the final LLM answer
+    Identical concurrent queries for a session share a single pipeline run.
+    Every stage is bounded by `deadline` (defaults to the chat budget).
     """
-    response = chat_app.invoke(
+    deadline = deadline or request_deadline("chat")
+    key = (session_id, query)
+    joining = chat_requests.in_flight(key)
+    answer = chat_requests.run(
+        key, lambda: _run_chat_agent(query, session_id, deadline)
+    )
+    if joining:
+        # Bounded by the owner's deadline otherwise; the shared run keeps
+        # going for the other callers when this one gives up
+        answer = with_deadline("chat_request", deadline, answer)
+    return await answer
+
+
+async def _run_chat_agent(query: str, session_id: str, deadline: float):
+    response = await get_chat_app().ainvoke(
         {
             "messages": [
                 HumanMessage(content=query),
             ],
             "session_id": session_id,
             "context": [],
+            "deadline": deadline,
         },
     )
 
     # Return only the final message content
     return (
-        "I'm sorry, I cannot assist with that request because it is inappropriate or violates the platform guidelines."
+        REFUSAL_MESSAGE
         if response["messages"][-1].content == "NO"
         else response["messages"][-1].content
     )
+
+
+async def astream_chat_agent(query: str, session_id: str, deadline: float = None):
+    """
+    Streams the chat agent pipeline as events:
+    - {"event": "stage", "data": "validated" | "retrieving" | "answering"}
+    - {"event": "token", "data": "<text chunk>"} from answer_using_context_node
+    - {"event": "done", "data": "<final answer>"}
+    """
+    inputs = {
+        "messages": [HumanMessage(content=query)],
+        "session_id": session_id,
+        "context": [],
+        "deadline": deadline or request_deadline("chat"),
+    }
+    answer_run_id = None
+
+    async for event in get_chat_app().astream_events(inputs, version="v2"):
+        kind = event["event"]
+        name = event["name"]
+
+        if kind == "on_chain_end" and name in (
+            "query_validator",
+            "query_triage",
+            "speculative_node",
+        ):
+            verdict = event["data"]["output"]["messages"][-1].content
+            if verdict.strip().upper() == "NO":
+                yield {"event": "done", "data": REFUSAL_MESSAGE}
+                return
+            yield {"event": "stage", "data": "validated"}
+
+        elif kind == "on_chain_start" and name == "tool_node":
+            yield {"event": "stage", "data": "retrieving"}
+
+        elif kind == "on_chain_start" and name == "answer_using_context_node":
+            yield {"event": "stage", "data": "answering"}
+
+        elif (
+            kind == "on_chat_model_stream"
+            and event["metadata"].get("langgraph_node") == "answer_using_context_node"
+        ):
+            # A hedged duplicate call may stream too; follow only the first one
+            answer_run_id = answer_run_id or event["run_id"]
+            token = event["data"]["chunk"].content
+            if token and event["run_id"] == answer_run_id:
+                yield {"event": "token", "data": token}
+
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            # Root graph finished — emit the final answer
+            final_message = event["data"]["output"]["messages"][-1]
+            yield {"event": "done", "data": final_message.content}
@@ -0,0 +1,121 @@
+# agents/chat_agent/query_prefilter.py
+
+import re
+import threading
+
+# -------------------------------
+# Lexicons
+# -------------------------------
+# Stems are matched at word starts, so "allerg" covers allergy/allergies/allergic.
+# CLINICAL_STEMS only occur in a clinical or patient context. GENERIC_STEMS are
+# common in everyday English ("history", "pressure", "treat", "doctor"), so they
+# only add weight to a query that already has a clinical anchor.
+# fmt: off
+CLINICAL_STEMS = [
+    "patient", "physician", "clinician", "clinical", "consultation", "symptom",
+    "diagnos", "prognos", "medicat", "prescri", "dosage", "fever", "cough",
+    "nausea", "vomit", "diarrh", "dizz", "fatigue", "headache", "allerg",
+    "chronic", "therap", "surgery", "surgical", "blood pressure", "hypertens",
+    "cardiac", "cardio", "pulmon", "renal", "kidney", "hepat", "diabet",
+    "insulin", "glucose", "cholesterol", "thyroid", "cancer", "tumou", "tumor",
+    "antibiot", "vaccin", "pregnan", "bmi", "anxiety", "depressi", "vital sign",
+    "laborator", "lab result", "ct scan", "x-ray", "xray", "mri", "ecg", "ekg",
+    "fractur", "comorbid",
+]
+
+GENERIC_STEMS = [
+    "doctor", "nurse", "clinic", "hospital", "consult", "complain", "pain",
+    "ache", "rash", "swell", "bleed", "breath", "medic", "drug", "dose",
+    "tablet", "pill", "histor", "acute", "treat", "procedure", "blood",
+    "pressure", "pulse", "heart", "lung", "liver", "infect", "smok", "alcohol",
+    "weight", "sleep", "mental", "vital", "labs", "test result", "follow-up",
+    "follow up", "referr", "assessment", "examin", "injur", "wound", "condition",
+]
+
+# No stems that also start medical words ("retard" → psychomotor retardation)
+ABUSE_STEMS = [
+    "fuck", "shit", "bitch", "bastard", "asshole", "dickhead", "cunt", "slut",
+    "whore", "porn", "nudes", "horny", "kill you", "i will kill", "idiot",
+    "stupid bot",
+]
+
+# Accepted queries must read as a question about the consultation
+QUESTION_WORDS = [
+    "what", "which", "when", "where", "who", "why", "how", "is", "are", "was",
+    "were", "does", "do", "did", "has", "have", "had", "any", "can", "could",
+    "should", "list", "summarise", "summarize",
+]
+# fmt: on
+
+
+def _compile(stems: list[str]) -> re.Pattern:
+    alternation = "|".join(re.escape(stem) for stem in stems)
+    return re.compile(rf"\b(?:{alternation})", re.IGNORECASE)
+
+
+_clinical_pattern = _compile(CLINICAL_STEMS)
+_generic_pattern = _compile(GENERIC_STEMS)
+_abuse_pattern = _compile(ABUSE_STEMS)
+_question_pattern = re.compile(rf"^\s*(?:{'|'.join(QUESTION_WORDS)})\b", re.IGNORECASE)
+
+# Distinct stems needed to accept without the LLM, at least one of them clinical
+MIN_ACCEPT_SCORE = 2
+# Longer queries can hide an unrelated request behind clinical words
+MAX_ACCEPT_WORDS = 25
+
+ACCEPT = "accept"
+REJECT = "reject"
+UNCERTAIN = "uncertain"
+
+_lock = threading.Lock()
+_stats = {ACCEPT: 0, REJECT: 0, UNCERTAIN: 0}
+
+
+# -------------------------------
+# Classifier
+# -------------------------------
+def prevalidate_query(query: str) -> str:
+    """
+    Cheap in-process classification run before the LLM query validator.
+
+    Returns:
+        "accept" for short clinical questions, "reject" for text that only
+        matches abuse, "uncertain" when the LLM validator must decide
+        (including queries with a single or only generic clinical-sounding
+        word, and clinical words around a non-question request).
+    """
+    clinical = {m.lower() for m in _clinical_pattern.findall(query)}
+    generic = {m.lower() for m in _generic_pattern.findall(query)}
+    abusive = _abuse_pattern.search(query) is not None
+    clinical_question = (
+        _question_pattern.match(query) is not None
+        and len(query.split()) <= MAX_ACCEPT_WORDS
+    )
+
+    if abusive and not clinical and not generic:
+        decision = REJECT
+    elif (
+        clinical
+        and not abusive
+        and clinical_question
+        and len(clinical) + len(generic) >= MIN_ACCEPT_SCORE
+    ):
+        decision = ACCEPT
+    else:
+        decision = UNCERTAIN
+
+    with _lock:
+        _stats[decision] += 1
+    return decision
+
+
+def prefilter_stats() -> dict:
+    """Decision counts and the fraction of LLM validation calls avoided."""
+    with _lock:
+        total = sum(_stats.values())
+        avoided = _stats[ACCEPT] + _stats[REJECT]
+        return {
+            **_stats,
+            "total": total,
+            "llm_calls_avoided_ratio": avoided / total if total else 0.0,
+        }
@@ -1,18 +1,11 @@
 from langchain_core.tools import tool
-import requests
-import os
-import json
+
+from service.rag_service import similarity_search
 
 
 @tool
-def get_relevant_contexts(query: str, session_id: str = None) -> list[str]:
+async def get_relevant_contexts(query: str, session_id: str = None) -> list[str]:
     """Fetch relevant contexts against a query."""
-    url = f"{os.environ['RAG_API_URL']}/api/similarity-search/"
-    headers = {"Content-Type": "application/json"}
-    payload = {"query": query, "sessionId": session_id}
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
-    response.raise_for_status()
-    data = response.json()
-    # print("Tool Response Data:", data)  # Debugging line
-    contexts = data.get("data", [])
+    contexts = await similarity_search(query, session_id)
+    # print("Tool Response Data:", contexts)  # Debugging line
     return contexts
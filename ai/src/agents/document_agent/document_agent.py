@@ -1,28 +1,39 @@
 # agents/document_agent/document_agent.py
 
 from typing import TypedDict, Annotated
+import asyncio
+import functools
 from langgraph.graph import StateGraph, END, add_messages
 from langchain_core.messages import SystemMessage, AIMessage
-from langchain_groq import ChatGroq
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel
 from langsmith import traceable
-from dotenv import load_dotenv
+from core.model.model import get_structured_llm, DOCUMENT_MODEL_SETTINGS
+from core.model.hedging import resilient_ainvoke, track_fallbacks
+from core.metrics import instrument_node
+from core.logger import get_logger
+from core.deadline import DeadlineExceeded, request_deadline, with_deadline
+from core.model.llm_schemas import DocumentField, create_dynamic_model
+from core.single_flight import SingleFlight
+from cofig import server_config
+from agents.document_agent.section_quality import flag_sections
+from agents.document_agent.document_cache import (
+    document_cache_key,
+    get_cached_document,
+    store_document,
+)
 from agents.document_agent.tools.generate_document_tool import (
     generate_custom_document_tool,
 )
+from agents.document_agent.tools.long_transcript import MAP_RUN_TAG
 
 
 # -------------------------------
 # Environment & Model Setup
 # -------------------------------
-load_dotenv()
-
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0.2,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2,
-)
+logger = get_logger("document_agent")
+
+LLM_SETTINGS = {"model": "llama-3.1-8b-instant", "temperature": 0.2}
 
 
 # -------------------------------
@@ -35,47 +46,71 @@ class State(TypedDict):
     document_type: str
     doctor_suggestions: str
     generated_document: object
+    draft_generated: bool  # False when the generator returned an error
+    # True when refinement was skipped to meet the deadline or the draft came
+    # from the fallback tier; such documents are returned but never cached
+    degraded: bool
+    deadline: float  # time.monotonic() budget end set by the API layer
 
 
 # -------------------------------
 # Document Generation Node
 # -------------------------------
 @traceable
-def document_generator_node(state: State):
+async def document_generator_node(state: State):
     """Generates a structured medical note from transcript and model."""
-    print("🧾 Generating medical document...")
+    logger.info("🧾 Generating medical document...")
 
-    result = generate_custom_document_tool.invoke(
-        {
-            "transcript": state["transcript"],
-            "custom_model": state["custom_model"],
-            "document_type": state["document_type"],
-            "doctor_suggestions": state["doctor_suggestions"],
-        }
-    )
+    with track_fallbacks() as fallbacks:
+        result = await with_deadline(
+            "document_generator",
+            state.get("deadline"),
+            generate_custom_document_tool.ainvoke(
+                {
+                    "transcript": state["transcript"],
+                    "custom_model": state["custom_model"],
+                    "document_type": state["document_type"],
+                    "doctor_suggestions": state["doctor_suggestions"],
+                }
+            ),
+        )
 
     state["generated_document"] = (
         result.content if hasattr(result, "content") else result
     )
 
-    print("✅ Document generated successfully.")
+    # The tool reports failures as {"error": ...} instead of raising
+    if isinstance(state["generated_document"], dict) and (
+        "error" in state["generated_document"]
+    ):
+        logger.error(
+            "❌ Document generation failed: %s", state["generated_document"]["error"]
+        )
+        return {
+            "messages": [AIMessage(content="Document generation failed.")],
+            "generated_document": state["generated_document"],
+            "draft_generated": False,
+        }
+
+    if fallbacks:
+        # Cache keys name the primary model; don't serve fallback output under it
+        logger.warning("⚠️ Draft generated by fallback tier %s.", fallbacks)
+    else:
+        logger.info("✅ Document generated successfully.")
 
     return {
         "messages": [AIMessage(content="Document generated successfully.")],
         "generated_document": state["generated_document"],
+        "draft_generated": True,
+        "degraded": bool(fallbacks),
     }
 
 
 # -------------------------------
 # Quality Checker Node
 # -------------------------------
-@traceable
-def document_quality_checker_node(state: State):
-    """Evaluates and refines the generated medical note for professionalism and clarity."""
-    print("🩺 Checking document phrasing and quality...")
-
-    # ✅ Build the quality check prompt
-    quality_prompt = SystemMessage(
+def _quality_prompt(document) -> SystemMessage:
+    return SystemMessage(
         content=f"""
 You are a professional medical documentation editor.
 
@@ -90,17 +125,72 @@ Rules:
 - DO NOT invent, omit, or modify medical meaning.
 
 Here is the document to refine:
-{state["generated_document"]}
+{document}
 
 Output must strictly follow the structure of the provided model.
 """
     )
 
-    refined_output = llm.with_structured_output(state["custom_model"]).invoke(
-        [quality_prompt]
+
+async def _refine_flagged_sections(draft: BaseModel, custom_model):
+    """Rewrites only the sections the local heuristics flagged."""
+    sections = draft.model_dump()
+    flagged = flag_sections(sections)
+    if not flagged:
+        logger.info("✅ All sections passed local quality checks.")
+        return draft
+
+    logger.info("✏️ Refining %d/%d flagged sections...", len(flagged), len(sections))
+    flagged_model = create_dynamic_model(
+        [
+            DocumentField(
+                label=label, description=custom_model.model_fields[label].description
+            )
+            for label in flagged
+        ],
+        f"{custom_model.__name__}Refinement",
+    )
+    structured_llm = get_structured_llm(flagged_model, **LLM_SETTINGS)
+    refined = await resilient_ainvoke(
+        LLM_SETTINGS["model"],
+        structured_llm,
+        [_quality_prompt({label: sections[label] for label in flagged})],
     )
+    return custom_model(**{**sections, **refined.model_dump()})
 
-    print(refined_output)
+
+@traceable
+async def document_quality_checker_node(state: State):
+    """Evaluates and refines the generated medical note for professionalism and clarity."""
+    mode = server_config["document_refinement"]["mode"]
+    draft = state["generated_document"]
+
+    # Never "refine" an error payload into a fabricated document
+    if mode == "skip" or not state.get("draft_generated"):
+        return {"messages": [], "generated_document": draft}
+
+    logger.info("🩺 Checking document phrasing and quality...")
+
+    if mode == "selective" and isinstance(draft, BaseModel):
+        refinement = _refine_flagged_sections(draft, state["custom_model"])
+    else:
+        structured_llm = get_structured_llm(state["custom_model"], **LLM_SETTINGS)
+        refinement = resilient_ainvoke(
+            LLM_SETTINGS["model"], structured_llm, [_quality_prompt(draft)]
+        )
+
+    try:
+        refined_output = await with_deadline(
+            "document_quality_checker", state.get("deadline"), refinement
+        )
+    except DeadlineExceeded:
+        if not isinstance(draft, BaseModel):
+            raise
+        # Degrade to the unrefined draft rather than failing the request
+        logger.warning("⚠️ Refinement timed out. Returning the unrefined draft.")
+        return {"messages": [], "generated_document": draft, "degraded": True}
+
+    logger.info("✅ Document refined successfully.")
 
     # ✅ Return — no message wrapping of model objects
     return {
@@ -112,35 +202,86 @@ Output must strictly follow the structure of the provided model.
 # -------------------------------
 # Graph Definition
 # -------------------------------
-graph = StateGraph(State)
+@functools.cache
+def get_document_agent():
+    """Compiled document graph, built once per worker on first use."""
+    graph = StateGraph(State)
 
-graph.add_node("document_generator", document_generator_node)
-graph.add_node("document_quality_checker", document_quality_checker_node)
+    graph.add_node(
+        "document_generator",
+        instrument_node("document", "document_generator", document_generator_node),
+    )
+    graph.add_node(
+        "document_quality_checker",
+        instrument_node(
+            "document", "document_quality_checker", document_quality_checker_node
+        ),
+    )
 
-graph.set_entry_point("document_generator")
-graph.add_edge("document_generator", "document_quality_checker")
-graph.add_edge("document_quality_checker", END)
+    graph.set_entry_point("document_generator")
+    graph.add_edge("document_generator", "document_quality_checker")
+    graph.add_edge("document_quality_checker", END)
 
-document_agent = graph.compile()
+    return graph.compile()
+
+
+document_requests = SingleFlight()
 
 
 # -------------------------------
 # Public Interface
 # -------------------------------
 @traceable
-def invoke_document_agent(
+async def invoke_document_agent(
     transcript: str,
     custom_model,
     document_type: str,
     doctor_suggestions: str = "",
+    deadline: float = None,
+    budget: str = "document",
 ):
     """
     Invokes the document generation pipeline:
     1. Generates a structured medical note.
     2. Refines it for phrasing and professionalism.
     3. Returns the final structured document (same as generate_custom_document()).
+    Identical requests are served from the document result cache, and
+    identical concurrent requests with the same `budget` share a single
+    pipeline run. Every stage is bounded by `deadline` (defaults to the
+    `budget` deadline from server_config).
     """
-    response = document_agent.invoke(
+    deadline = deadline or request_deadline(budget)
+    cache_key = _cache_key(transcript, custom_model, document_type, doctor_suggestions)
+    cached = await get_cached_document(cache_key, custom_model)
+    if cached is not None:
+        logger.info("♻️ Serving document from cache.")
+        return cached
+
+    # A queued job never joins a synchronous run, or it would inherit its limit
+    flight_key = (budget, cache_key)
+    joining = document_requests.in_flight(flight_key)
+    document = document_requests.run(
+        flight_key,
+        lambda: _run_document_agent(
+            cache_key,
+            transcript,
+            custom_model,
+            document_type,
+            doctor_suggestions,
+            deadline,
+        ),
+    )
+    if joining:
+        # Bounded by the owner's deadline otherwise; the shared run keeps
+        # going for the other callers when this one gives up
+        document = with_deadline("document_request", deadline, document)
+    return await document
+
+
+async def _run_document_agent(
+    cache_key, transcript, custom_model, document_type, doctor_suggestions, deadline
+):
+    response = await get_document_agent().ainvoke(
         {
             "messages": [],
             "transcript": transcript,
@@ -148,8 +289,158 @@ def invoke_document_agent(
             "document_type": document_type,
             "doctor_suggestions": doctor_suggestions,
             "generated_document": {},
+            "draft_generated": False,
+            "degraded": False,
+            "deadline": deadline,
         },
     )
 
+    document = _final_document(response)
+    if not response.get("degraded"):
+        await store_document(cache_key, document)
+
     # ✅ Return the structured model directly (not a message)
-    return response["generated_document"]
+    return document
+
+
+def _final_document(output: dict):
+    """Returns the pipeline's document, raising if generation failed."""
+    if not output.get("draft_generated"):
+        error = output["generated_document"].get("error", "unknown error")
+        raise RuntimeError(f"Document generation failed: {error}")
+    return output["generated_document"]
+
+
+async def invoke_document_agent_batch(
+    transcript: str, documents: list[dict], deadline: float = None
+):
+    """
+    Runs several document pipelines over one transcript concurrently, capped
+    by server_config["batch_max_concurrency"].
+
+    Args:
+        transcript: Consultation transcript shared by every document
+        documents: Dicts with custom_model, document_type and doctor_suggestions
+        deadline: Shared budget end for the whole batch
+
+    Returns:
+        One entry per document, in order: the generated document or the
+        exception that document's pipeline raised.
+    """
+    deadline = deadline or request_deadline("document")
+    semaphore = asyncio.Semaphore(server_config["batch_max_concurrency"])
+
+    async def run(document):
+        async with semaphore:
+            return await invoke_document_agent(
+                transcript,
+                document["custom_model"],
+                document["document_type"],
+                document["doctor_suggestions"],
+                deadline,
+            )
+
+    return await asyncio.gather(
+        *(run(document) for document in documents), return_exceptions=True
+    )
+
+
+def _cache_key(transcript, custom_model, document_type, doctor_suggestions):
+    return document_cache_key(
+        transcript,
+        custom_model,
+        document_type,
+        doctor_suggestions,
+        [DOCUMENT_MODEL_SETTINGS, LLM_SETTINGS],
+    )
+
+
+async def astream_document_agent(
+    transcript: str,
+    custom_model,
+    document_type: str,
+    doctor_suggestions: str = "",
+    deadline: float = None,
+):
+    """
+    Streams the document pipeline as events:
+    - {"event": "section", "data": {"label", "content"}} for each draft section,
+      sent as soon as the generator has finished writing it
+    - {"event": "stage", "data": "refining"} once the draft is complete
+    - {"event": "done", "data": <refined structured document>}
+    """
+    cache_key = _cache_key(transcript, custom_model, document_type, doctor_suggestions)
+    cached = await get_cached_document(cache_key, custom_model)
+    if cached is not None:
+        for label, content in cached.model_dump().items():
+            yield {"event": "section", "data": {"label": label, "content": content}}
+        yield {"event": "done", "data": cached}
+        return
+
+    inputs = {
+        "messages": [],
+        "transcript": transcript,
+        "custom_model": custom_model,
+        "document_type": document_type,
+        "doctor_suggestions": doctor_suggestions,
+        "generated_document": {},
+        "draft_generated": False,
+        "degraded": False,
+        "deadline": deadline or request_deadline("document"),
+    }
+    # run_id → streamed argument chunks (section groups run concurrently)
+    tool_args = {}
+    emitted = set()
+
+    async for event in get_document_agent().astream_events(inputs, version="v2"):
+        kind = event["event"]
+        node = event["metadata"].get("langgraph_node")
+
+        if (
+            kind == "on_chat_model_stream"
+            and node == "document_generator"
+            and MAP_RUN_TAG not in event.get("tags", [])
+        ):
+            new_args = "".join(
+                chunk.get("args") or ""
+                for chunk in event["data"]["chunk"].tool_call_chunks
+            )
+            run_args = tool_args.setdefault(event["run_id"], [])
+            run_args.append(new_args)
+            # Template fields are all strings, so a section can only complete
+            # on a chunk with a quote; re-parsing on every chunk is quadratic
+            if '"' not in new_args:
+                continue
+            partial = parse_partial_json("".join(run_args))
+            if not isinstance(partial, dict):
+                continue
+            # Every key before the one currently being written is complete
+            for label in list(partial)[:-1]:
+                if label not in emitted and label in custom_model.model_fields:
+                    emitted.add(label)
+                    yield {
+                        "event": "section",
+                        "data": {"label": label, "content": partial[label]},
+                    }
+
+        elif kind == "on_chain_end" and event["name"] == "document_generator":
+            if not event["data"]["output"]["draft_generated"]:
+                continue  # The pipeline's final output raises below
+            draft = event["data"]["output"]["generated_document"]
+            if isinstance(draft, BaseModel):
+                draft = draft.model_dump()
+            for label in custom_model.model_fields:
+                if label not in emitted and label in draft:
+                    emitted.add(label)
+                    yield {
+                        "event": "section",
+                        "data": {"label": label, "content": draft[label]},
+                    }
+            yield {"event": "stage", "data": "refining"}
+
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            output = event["data"]["output"]
+            document = _final_document(output)
+            if not output.get("degraded"):
+                await store_document(cache_key, document)
+            yield {"event": "done", "data": document}
@@ -0,0 +1,139 @@
+# agents/document_agent/document_cache.py
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from cofig import server_config
+from core.model.model import schema_fingerprint
+from core.ttl_cache import TTLCache
+
+_settings = server_config["document_cache"]
+
+_memory = TTLCache(
+    max_entries=_settings["max_entries"], ttl_seconds=_settings["ttl_seconds"]
+)
+_disk_lock = threading.Lock()
+_disk: sqlite3.Connection | None = None
+_disk_stats = {"hits": 0, "misses": 0}
+
+
+# -------------------------------
+# Keys
+# -------------------------------
+def document_cache_key(
+    transcript: str,
+    custom_model,
+    document_type: str,
+    doctor_suggestions: str,
+    model_settings: list[dict],
+) -> str:
+    """Content hash of everything that determines a generated document."""
+    payload = json.dumps(
+        [
+            transcript,
+            schema_fingerprint(custom_model),
+            document_type,
+            doctor_suggestions or "",
+            model_settings,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# -------------------------------
+# Disk Tier (SQLite)
+# -------------------------------
+def _disk_connection() -> sqlite3.Connection:
+    global _disk
+    if _disk is None:
+        _disk = sqlite3.connect(_settings["disk_path"], check_same_thread=False)
+        _disk.execute(
+            "CREATE TABLE IF NOT EXISTS documents "
+            "(key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        _disk.execute(
+            "CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at)"
+        )
+    return _disk
+
+
+def _disk_get(key: str) -> str | None:
+    with _disk_lock:
+        row = (
+            _disk_connection()
+            .execute(
+                "SELECT payload FROM documents WHERE key = ? AND created_at > ?",
+                (key, time.time() - _settings["ttl_seconds"]),
+            )
+            .fetchone()
+        )
+    return row[0] if row else None
+
+
+def _disk_set(key: str, payload: str):
+    with _disk_lock:
+        connection = _disk_connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            connection.execute(
+                "DELETE FROM documents WHERE created_at <= ?",
+                (time.time() - _settings["ttl_seconds"],),
+            )
+            connection.execute(
+                "DELETE FROM documents WHERE key NOT IN "
+                "(SELECT key FROM documents ORDER BY created_at DESC LIMIT ?)",
+                (_settings["disk_max_entries"],),
+            )
+
+
+# -------------------------------
+# Public Interface
+# -------------------------------
+async def get_cached_document(key: str, custom_model):
+    """Returns the cached document for `key` (memory first, then disk) or None."""
+    if not _settings["enabled"]:
+        return None
+
+    document = _memory.get(key)
+    if document is not None or not _settings["disk_path"]:
+        return document
+
+    payload = await asyncio.to_thread(_disk_get, key)
+    if payload is None:
+        _disk_stats["misses"] += 1
+        return None
+
+    _disk_stats["hits"] += 1
+    document = custom_model.model_validate_json(payload)
+    _memory.set(key, document)
+    return document
+
+
+async def store_document(key: str, document):
+    """Stores a generated document in the memory tier and, if enabled, on disk."""
+    if not _settings["enabled"]:
+        return
+
+    _memory.set(key, document)
+    if _settings["disk_path"]:
+        await asyncio.to_thread(_disk_set, key, document.model_dump_json())
+
+
+def document_cache_stats() -> dict:
+    """Per-tier hit/miss counters and the overall hit rate."""
+    memory = _memory.stats()
+    disk_hits = _disk_stats["hits"]
+    lookups = memory["hits"] + memory["misses"]
+    return {
+        "memory": memory,
+        "disk": dict(_disk_stats),
+        "hit_rate": (memory["hits"] + disk_hits) / lookups if lookups else 0.0,
+    }
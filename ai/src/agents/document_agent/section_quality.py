@@ -0,0 +1,69 @@
+# agents/document_agent/section_quality.py
+
+import re
+import threading
+
+from cofig import server_config
+
+# Conversational residue that should not survive into a clinical note
+COLLOQUIAL_PATTERN = re.compile(
+    r"\b(?:um+|uh+|yeah|gonna|wanna|kinda|sorta|okay so|you know|i think|"
+    r"i guess|like,|stuff|things like that)\b",
+    re.IGNORECASE,
+)
+SPEAKER_TAG_PATTERN = re.compile(r"^\s*(?:doctor|patient|dr\.?|pt)\s*:", re.I | re.M)
+REPEATED_WORD_PATTERN = re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE)
+
+_lock = threading.Lock()
+_stats = {"documents": 0, "sections_checked": 0, "sections_refined": 0}
+
+
+def section_issues(text) -> list[str]:
+    """
+    Scores one generated section with local heuristics.
+    Returns the list of detected issues; an empty list means the section is clean.
+    """
+    settings = server_config["document_refinement"]
+    text = str(text or "").strip()
+    issues = []
+
+    if len(text) < settings["min_section_chars"]:
+        issues.append("too_short")
+    if len(text) > settings["max_section_chars"]:
+        issues.append("too_long")
+    if text and text[0].islower():
+        issues.append("lowercase_start")
+    if text and text[-1] not in ".!?)\"'" and "\n" not in text:
+        issues.append("missing_terminal_punctuation")
+    if COLLOQUIAL_PATTERN.search(text):
+        issues.append("colloquial_phrasing")
+    if SPEAKER_TAG_PATTERN.search(text):
+        issues.append("transcript_speaker_tags")
+    if REPEATED_WORD_PATTERN.search(text):
+        issues.append("repeated_words")
+    return issues
+
+
+def flag_sections(document: dict) -> dict[str, list[str]]:
+    """Maps each section label that needs refinement to its issues."""
+    flagged = {}
+    for label, text in document.items():
+        issues = section_issues(text)
+        if issues:
+            flagged[label] = issues
+
+    with _lock:
+        _stats["documents"] += 1
+        _stats["sections_checked"] += len(document)
+        _stats["sections_refined"] += len(flagged)
+    return flagged
+
+
+def refinement_stats() -> dict:
+    """Counts of sections checked and sent to the LLM for refinement."""
+    with _lock:
+        checked = _stats["sections_checked"]
+        return {
+            **_stats,
+            "refined_ratio": _stats["sections_refined"] / checked if checked else 0.0,
+        }
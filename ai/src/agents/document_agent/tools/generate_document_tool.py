@@ -1,28 +1,27 @@
 # core/tools/document_tools.py
+import asyncio
 from langchain_core.tools import tool
-from core.model.model import generate_llm
+from core.model.model import generate_document
+from core.model.llm_schemas import DocumentField, create_dynamic_model
+from core.model.tokens import estimate_tokens
+from agents.document_agent.tools.long_transcript import (
+    generate_long_transcript_document,
+)
+from cofig import server_config
+from core.logger import get_logger
 from pydantic import BaseModel
 from typing import Type
 
+logger = get_logger("document_tool")
 
-@tool("generate_custom_document")
-def generate_custom_document_tool(
+
+def build_document_prompt(
     transcript: str,
-    custom_model: Type[BaseModel],
+    fields_info: list[dict],
     document_type: str,
     doctor_suggestions: str = None,
-):
-    """
-    Tool: Generate a structured medical note using the transcript,
-    custom fields, and doctor's suggestions.
-    """
-    # Get field info from the model
-    fields_info = [
-        {"label": name, "description": field.description}
-        for name, field in custom_model.__fields__.items()
-    ]
-
-    # Build prompt
+) -> str:
+    """Builds the scribe prompt for the given sections of a document."""
     prompt_sections = [
         f"{field['label'].upper()}: {field['description']}" for field in fields_info
     ]
@@ -50,9 +49,104 @@ def generate_custom_document_tool(
         + f"\n\nCONVERSATION:\n{transcript}\n\n"
         f"✅ Ensure the note follows all rules and doctor's suggestions."
     )
+    return prompt_template
+
+
+async def generate_sections_in_groups(
+    transcript: str,
+    custom_model: Type[BaseModel],
+    fields_info: list[dict],
+    document_type: str,
+    doctor_suggestions: str = None,
+):
+    """
+    Splits the template into section groups, generates the groups
+    concurrently against the same transcript and merges them back into one
+    `custom_model` instance. Only groups that fail are retried.
+    """
+    settings = server_config["document_generation"]
+    group_size = settings["group_size"]
+    groups = [
+        fields_info[i : i + group_size] for i in range(0, len(fields_info), group_size)
+    ]
+    semaphore = asyncio.Semaphore(settings["max_concurrency"])
+
+    async def generate_group(index: int, group: list[dict]) -> dict:
+        group_model = create_dynamic_model(
+            [DocumentField(**field) for field in group],
+            f"{custom_model.__name__}Group{index}",
+        )
+        prompt = build_document_prompt(
+            transcript, group, document_type, doctor_suggestions
+        )
+        async with semaphore:
+            response = await generate_document(group_model, prompt)
+        return response.model_dump()
+
+    merged = {}
+    pending = dict(enumerate(groups))
+    for attempt in range(settings["group_retries"] + 1):
+        results = await asyncio.gather(
+            *(generate_group(index, group) for index, group in pending.items()),
+            return_exceptions=True,
+        )
+        failed = {}
+        for (index, group), result in zip(pending.items(), results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    "Section group %d failed (attempt %d): %s",
+                    index,
+                    attempt + 1,
+                    result,
+                )
+                failed[index] = group
+            else:
+                merged.update(result)
+        pending = failed
+        if not pending:
+            break
+
+    if pending:
+        raise RuntimeError(f"{len(pending)} section group(s) failed to generate")
+
+    return custom_model(**merged)
+
+
+@tool("generate_custom_document")
+async def generate_custom_document_tool(
+    transcript: str,
+    custom_model: Type[BaseModel],
+    document_type: str,
+    doctor_suggestions: str = None,
+):
+    """
+    Tool: Generate a structured medical note using the transcript,
+    custom fields, and doctor's suggestions.
+    """
+    # Get field info from the model
+    fields_info = [
+        {"label": name, "description": field.description}
+        for name, field in custom_model.__fields__.items()
+    ]
+
+    settings = server_config["document_generation"]
+    long_transcript_threshold = server_config["long_transcript"]["threshold_tokens"]
 
     try:
-        response = generate_llm(custom_model).invoke(prompt_template)
+        if estimate_tokens(transcript) > long_transcript_threshold:
+            return await generate_long_transcript_document(
+                transcript, custom_model, fields_info, document_type, doctor_suggestions
+            )
+
+        if settings["parallel_sections"] and len(fields_info) > settings["group_size"]:
+            return await generate_sections_in_groups(
+                transcript, custom_model, fields_info, document_type, doctor_suggestions
+            )
+
+        prompt_template = build_document_prompt(
+            transcript, fields_info, document_type, doctor_suggestions
+        )
+        response = await generate_document(custom_model, prompt_template)
         return response
     except Exception as e:
         return {"error": str(e)}
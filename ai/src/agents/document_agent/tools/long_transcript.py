@@ -0,0 +1,203 @@
+# agents/document_agent/tools/long_transcript.py
+
+import asyncio
+import re
+import time
+from pydantic import BaseModel
+from typing import Type
+
+from cofig import server_config
+from core.model.model import generate_document
+from core.model.tokens import CHARS_PER_TOKEN, estimate_tokens
+from core.logger import get_logger
+
+logger = get_logger("long_transcript")
+
+# Tag on the per-chunk extraction runs; their partial facts must not be
+# streamed to clients as document sections
+MAP_RUN_TAG = "long_transcript_map"
+
+_sentence_end = re.compile(r"(?<=[.!?])\s+")
+
+_stats = {
+    "runs": 0,
+    "chunks": 0,
+    "map_seconds": 0.0,
+    "reduce_seconds": 0.0,
+    "input_tokens": 0,
+    "reduce_input_tokens": 0,
+}
+
+
+# -------------------------------
+# Chunking
+# -------------------------------
+def _split_line(line: str, max_tokens: int) -> list[str]:
+    """
+    Breaks a line longer than `max_tokens` into sentences, and sentences that
+    are still too long into fixed character windows. Speech-to-text output
+    usually arrives as one line, so this is the common path.
+    """
+    if estimate_tokens(line) <= max_tokens:
+        return [line]
+
+    width = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for sentence in _sentence_end.split(line):
+        if not sentence:
+            continue
+        if estimate_tokens(sentence) <= max_tokens:
+            pieces.append(sentence)
+        else:
+            pieces.extend(
+                sentence[start : start + width]
+                for start in range(0, len(sentence), width)
+            )
+    return pieces
+
+
+def chunk_transcript(
+    transcript: str, chunk_tokens: int, overlap_tokens: int
+) -> list[str]:
+    """
+    Splits a transcript on line (then sentence) boundaries into chunks of
+    about `chunk_tokens`, repeating the last `overlap_tokens` worth of text at
+    the start of the next chunk so statements spanning a boundary are kept.
+    """
+    chunks = []
+    current, current_tokens = [], 0
+    max_piece_tokens = max(1, chunk_tokens - overlap_tokens)
+    pieces = (
+        piece
+        for line in transcript.splitlines()
+        for piece in _split_line(line, max_piece_tokens)
+    )
+
+    for line in pieces:
+        line_tokens = estimate_tokens(line) + 1
+        if current and current_tokens + line_tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous) + 1
+                if overlap_size + previous_tokens > overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += previous_tokens
+            current, current_tokens = overlap, overlap_size
+        current.append(line)
+        current_tokens += line_tokens
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+# -------------------------------
+# Prompts
+# -------------------------------
+def _sections(fields_info: list[dict]) -> str:
+    return "\n".join(
+        f"{field['label'].upper()}: {field['description']}" for field in fields_info
+    )
+
+
+def _map_prompt(chunk, index, total, fields_info, document_type) -> str:
+    return (
+        f"You are a professional medical scribe. Below is PART {index + 1} of "
+        f"{total} of a long doctor-patient conversation.\n\n"
+        f"Extract every clinically relevant fact in this part into the sections "
+        f"of a {document_type} note:\n\n{_sections(fields_info)}\n\n"
+        f"⚠️ RULE: Only use information present in this part. If a section has "
+        f"nothing in this part, return an empty string for it. Do not invent "
+        f"information.\n\nCONVERSATION PART:\n{chunk}"
+    )
+
+
+def _reduce_prompt(partials, fields_info, document_type, doctor_suggestions) -> str:
+    notes = "\n\n".join(
+        f"--- PART {index + 1} ---\n"
+        + "\n".join(f"{label.upper()}: {value}" for label, value in partial.items())
+        for index, partial in enumerate(partials)
+    )
+    suggestions = (
+        f"DOCTOR'S SUGGESTIONS (MANDATORY):\n{doctor_suggestions}\n\n"
+        f"⚠️ RULE: You MUST strictly follow and apply these suggestions. "
+        f"They override any conflicting information in the notes.\n\n"
+        if doctor_suggestions and doctor_suggestions.strip()
+        else ""
+    )
+    return (
+        f"{suggestions}You are a professional medical scribe. The following "
+        f"partial notes were extracted, in order, from consecutive parts of one "
+        f"consultation. Merge them into a single {document_type} note with "
+        f"EXACTLY these {len(fields_info)} sections:\n\n{_sections(fields_info)}"
+        f"\n\n⚠️ RULE: Combine and deduplicate facts, keep the latest statement "
+        f"when parts conflict, and do not add or invent information.\n\n{notes}"
+    )
+
+
+# -------------------------------
+# Map-Reduce Pipeline
+# -------------------------------
+async def generate_long_transcript_document(
+    transcript: str,
+    custom_model: Type[BaseModel],
+    fields_info: list[dict],
+    document_type: str,
+    doctor_suggestions: str = None,
+) -> BaseModel:
+    """
+    Generates a document from a transcript too long for a single prompt:
+    chunk → concurrent per-chunk extraction into the template → merge.
+    """
+    settings = server_config["long_transcript"]
+    semaphore = asyncio.Semaphore(settings["max_concurrency"])
+
+    chunks = chunk_transcript(
+        transcript, settings["chunk_tokens"], settings["overlap_tokens"]
+    )
+
+    async def extract(index: int, chunk: str) -> dict:
+        prompt = _map_prompt(chunk, index, len(chunks), fields_info, document_type)
+        async with semaphore:
+            response = await generate_document(custom_model, prompt, tags=[MAP_RUN_TAG])
+        return response.model_dump()
+
+    map_started = time.perf_counter()
+    partials = await asyncio.gather(
+        *(extract(index, chunk) for index, chunk in enumerate(chunks))
+    )
+    map_seconds = time.perf_counter() - map_started
+
+    reduce_started = time.perf_counter()
+    reduce_prompt = _reduce_prompt(
+        partials, fields_info, document_type, doctor_suggestions
+    )
+    document = await generate_document(custom_model, reduce_prompt)
+    reduce_seconds = time.perf_counter() - reduce_started
+
+    input_tokens = estimate_tokens(transcript)
+    reduce_tokens = estimate_tokens(reduce_prompt)
+    _stats["runs"] += 1
+    _stats["chunks"] += len(chunks)
+    _stats["map_seconds"] += map_seconds
+    _stats["reduce_seconds"] += reduce_seconds
+    _stats["input_tokens"] += input_tokens
+    _stats["reduce_input_tokens"] += reduce_tokens
+
+    logger.info(
+        "📚 Long transcript: ~%d tokens in %d chunks, map %.2fs, reduce %.2fs "
+        "(~%d reduce tokens)",
+        input_tokens,
+        len(chunks),
+        map_seconds,
+        reduce_seconds,
+        reduce_tokens,
+    )
+    return document
+
+
+def long_transcript_stats() -> dict:
+    """Cumulative chunk counts, per-stage timings and token estimates."""
+    return dict(_stats)
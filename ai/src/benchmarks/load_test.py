@@ -0,0 +1,256 @@
+# ============================================================
+# 📈 Offline Load Test
+# Drives the chat and custom-document endpoints, plain and streaming,
+# through the real app, agents, middleware and rate-limit governor at a
+# fixed concurrency, with Groq replaced by StubChatGroq and the RAG service
+# by a loopback stub. Needs no network access or API keys, so it can run
+# in CI: the exit code is non-zero on any failed request or p95 overrun.
+#
+# Run from ai/src:  python -m benchmarks.load_test [options]
+#   e.g. python -m benchmarks.load_test --requests 200 --concurrency 16
+#        python -m benchmarks.load_test --scenario chat --pipeline fused
+#        python -m benchmarks.load_test --requests 8 --max-p95-ms 20000
+# ============================================================
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+
+import httpx
+
+from cofig import server_config
+from core.model import model
+from benchmarks import stub_llm
+from benchmarks.stub_llm import StubChatGroq
+from benchmarks.stub_rag import StubRagServer
+
+API_KEY = "benchmark-key"
+
+TRANSCRIPT = (
+    "Doctor: What brings you in today? Patient: I've had a dry cough for about "
+    "three weeks and it's worse at night. Doctor: Any fever or shortness of "
+    "breath? Patient: No fever, a little breathless on stairs. Doctor: Are you "
+    "still taking lisinopril for your blood pressure? Patient: Yes, 10 mg daily."
+)
+
+SOAP_FIELDS = [
+    {"label": "subjective", "description": "Patient-reported symptoms and history"},
+    {"label": "objective", "description": "Examination findings and vitals"},
+    {"label": "assessment", "description": "Clinical assessment and diagnosis"},
+    {"label": "plan", "description": "Treatment plan and follow-up"},
+]
+
+
+# -------------------------------
+# Scenarios
+# -------------------------------
+# Every request is distinct, across scenarios too, so the result caches and
+# single-flight coalescing don't hide the pipeline cost.
+def chat_payload(name: str, i: int) -> dict:
+    return {
+        "query": (
+            f"What medication is the patient taking for hypertension? #{name}-{i}"
+        ),
+        "session_id": f"benchmark-session-{i % 50}",
+    }
+
+
+def document_payload(name: str, i: int) -> dict:
+    return {
+        "transcript": f"{TRANSCRIPT} ({name} visit {i}.)",
+        "document_type": "SOAP",
+        "fields": SOAP_FIELDS,
+        "doctor_suggestions": "",
+    }
+
+
+# name -> (path, payload builder, responds with server-sent events)
+SCENARIOS = {
+    "chat": ("/api/generate-answer", chat_payload, False),
+    "chat_stream": ("/api/generate-answer/stream", chat_payload, True),
+    "document": ("/api/generate-custom-document", document_payload, False),
+    "document_stream": (
+        "/api/generate-custom-document/stream",
+        document_payload,
+        True,
+    ),
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def _post_stream(client: httpx.AsyncClient, path: str, payload: dict) -> bool:
+    """
+    Reads a server-sent event response to the end. Streams always answer 200,
+    so success means content (tokens or sections) and a "done" event arrived
+    and no "error" event did.
+    """
+    events = set()
+    async with client.stream("POST", path, json=payload) as response:
+        if response.status_code != 200:
+            return False
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                events.add(line.removeprefix("event: "))
+    streamed_content = bool(events & {"token", "section"})
+    return streamed_content and "done" in events and "error" not in events
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, name: str, requests: int, concurrency: int
+) -> dict:
+    """Sends `requests` requests from `concurrency` closed-loop workers."""
+    path, payload, streamed = SCENARIOS[name]
+    indexes = iter(range(requests))
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:  # shared iterator: each index is sent exactly once
+            started = time.perf_counter()
+            try:
+                if streamed:
+                    ok = await _post_stream(client, path, payload(name, i))
+                else:
+                    response = await client.post(path, json=payload(name, i))
+                    ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "path": path,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_report(results: list[dict]):
+    print(
+        f"{'scenario':<16}{'requests':>10}{'conc':>6}{'errors':>8}"
+        f"{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<16}{r['requests']:>10}{r['concurrency']:>6}"
+            f"{r['errors']:>8}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.1f}"
+            f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+        )
+
+
+# -------------------------------
+# Harness
+# -------------------------------
+async def main(args) -> int:
+    stub_llm.profile.first_token_seconds = args.llm_latency
+    stub_llm.profile.tokens_per_second = args.tokens_per_second
+    server_config["llm_governor"]["enabled"] = not args.no_governor
+    if args.pipeline:
+        server_config["chat_pipeline"] = args.pipeline
+
+    # Every client built through get_chat_model() becomes a stub
+    model.ChatGroq = StubChatGroq
+
+    with StubRagServer(latency_seconds=args.rag_latency) as rag:
+        os.environ["RAG_API_URL"] = rag.url
+
+        from main import create_app
+
+        app = create_app()
+        # Keep log I/O out of the numbers
+        logging.getLogger("clinico").setLevel(logging.WARNING)
+
+        results = []
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://benchmark",
+                headers={"CLINICO_AI_API_KEY": API_KEY},
+                timeout=None,
+            ) as client:
+                for name in args.scenario or list(SCENARIOS):
+                    results.append(
+                        await run_scenario(
+                            client, name, args.requests, args.concurrency
+                        )
+                    )
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    for r in results:
+        if r["errors"]:
+            print(f"FAIL {r['scenario']}: {r['errors']} failed requests")
+            failed = True
+        if args.max_p95_ms is not None and r["p95_ms"] > args.max_p95_ms:
+            print(
+                f"FAIL {r['scenario']}: p95 {r['p95_ms']:.1f} ms is over the "
+                f"{args.max_p95_ms:.1f} ms budget"
+            )
+            failed = True
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test")
+    parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS), help="repeatable"
+    )
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.15, help="stub time to first token"
+    )
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=400.0, help="stub output rate"
+    )
+    parser.add_argument("--rag-latency", type=float, default=0.02)
+    parser.add_argument(
+        "--pipeline", choices=["serial", "speculative", "fused"], default=None
+    )
+    parser.add_argument(
+        "--no-governor",
+        action="store_true",
+        help="turn off the Groq rate-limit governor (measures raw pipeline cost)",
+    )
+    parser.add_argument(
+        "--max-p95-ms",
+        type=float,
+        default=None,
+        help="fail if any scenario's p95 latency exceeds this",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
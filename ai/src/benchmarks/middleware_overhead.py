@@ -0,0 +1,99 @@
+# ============================================================
+# ⏱️ Middleware Overhead Micro-Benchmark
+# Compares the previous pair of @app.middleware("http") layers
+# (BaseHTTPMiddleware) with the pure-ASGI ClinicoMiddleware.
+#
+# Run from ai/src:  python -m benchmarks.middleware_overhead [requests]
+# ============================================================
+
+import asyncio
+import logging
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+from core.logger import get_logger
+from core.middleware import ClinicoMiddleware
+
+API_KEY = "benchmark-key"
+logger = get_logger("benchmark")
+
+
+def _add_endpoint(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"status": "success"}
+
+    return app
+
+
+def build_bare_app() -> FastAPI:
+    return _add_endpoint(FastAPI())
+
+
+def build_previous_app() -> FastAPI:
+    """The middleware stack main.py used before the pure-ASGI rewrite."""
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def check_api_key(request: Request, call_next):
+        api_key = request.headers.get("CLINICO_AI_API_KEY")
+        if api_key != API_KEY:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def log_incoming_request(request: Request, call_next):
+        logger.info("🌐 Incoming request: %s", request.url.path)
+        return await call_next(request)
+
+    return _add_endpoint(app)
+
+
+def build_current_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ClinicoMiddleware, api_key=API_KEY, check_api_key=True)
+    return _add_endpoint(app)
+
+
+async def time_requests(app: FastAPI, requests: int) -> float:
+    """Mean seconds per request over `requests` sequential in-process calls."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://benchmark",
+        headers={"CLINICO_AI_API_KEY": API_KEY},
+    ) as client:
+        for _ in range(min(200, requests)):  # warm-up
+            (await client.get("/ping")).raise_for_status()
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int):
+    # Keep log I/O out of the numbers: both stacks only pay the level check
+    logging.getLogger("clinico").setLevel(logging.WARNING)
+
+    bare = await time_requests(build_bare_app(), requests)
+    previous = await time_requests(build_previous_app(), requests)
+    current = await time_requests(build_current_app(), requests)
+
+    print(f"requests per stack:        {requests}")
+    print(f"no middleware:             {bare * 1e6:8.1f} µs/request")
+    print(
+        f"previous (2x BaseHTTP):    {previous * 1e6:8.1f} µs/request "
+        f"(+{(previous - bare) * 1e6:.1f} µs overhead)"
+    )
+    print(
+        f"current (pure ASGI):       {current * 1e6:8.1f} µs/request "
+        f"(+{(current - bare) * 1e6:.1f} µs overhead)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
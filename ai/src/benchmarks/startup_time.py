@@ -0,0 +1,68 @@
+# ============================================================
+# ⏱️ Cold-Start Budget Check
+# Measures `import main` and the lifespan warm-up in fresh interpreters
+# and fails when the median exceeds server_config["startup"]["budget_seconds"].
+#
+# Run from ai/src:  python -m benchmarks.startup_time [runs]
+# ============================================================
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from cofig import server_config
+
+# Executed in a fresh interpreter so every run pays the full import cost
+_PROBE = """
+import asyncio, json, logging, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+logging.getLogger("clinico").setLevel(logging.WARNING)
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+print(json.dumps({"import": imported - started, "startup": ready - imported}))
+"""
+
+
+def measure_once() -> dict:
+    # Clients are only constructed, never called, so a placeholder key is enough
+    env = {"GROQ_API_KEY": "startup-benchmark", **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(runs: int) -> int:
+    budget = server_config["startup"]["budget_seconds"]
+    samples = [measure_once() for _ in range(runs)]
+
+    imports = statistics.median(s["import"] for s in samples)
+    startup = statistics.median(s["startup"] for s in samples)
+    total = imports + startup
+
+    print(f"runs:                {runs}")
+    print(f"import main:         {imports:6.2f} s (median)")
+    print(f"lifespan warm-up:    {startup:6.2f} s (median)")
+    print(f"total:               {total:6.2f} s (budget {budget:.2f} s)")
+
+    if total > budget:
+        print("❌ Cold start is over budget.")
+        return 1
+    print("✅ Cold start is within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
@@ -0,0 +1,202 @@
+# ============================================================
+# 🤖 Stub Chat Model
+# Deterministic, offline stand-in for ChatGroq. Latency is modelled as
+# time-to-first-token plus output tokens at a fixed generation rate, and
+# replies follow the same shapes the agents expect from Groq: YES/NO
+# verdicts, RAG tool calls and structured (tool-call) outputs. Streaming
+# runs emit the same reply as content or tool-call argument chunks.
+# ============================================================
+
+import asyncio
+import itertools
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, Field
+
+from core.model.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+
+@dataclass
+class StubProfile:
+    """Latency and size knobs shared by every stub client."""
+
+    first_token_seconds: float = 0.15  # Queueing + prompt processing
+    tokens_per_second: float = 400.0  # Output generation rate
+    answer_tokens: int = 60  # Length of free-text answers
+    field_tokens: int = 40  # Length of each structured-output string field
+    stream_chunk_tokens: int = 4  # Size of each streamed content/argument chunk
+
+
+profile = StubProfile()
+_call_ids = itertools.count()
+
+_FILLER = (
+    "The patient reports intermittent symptoms that were reviewed during the "
+    "consultation and documented with the relevant history and findings. "
+)
+
+
+def _text(tokens: int) -> str:
+    """Deterministic filler of roughly `tokens` tokens (see estimate_tokens)."""
+    chars = tokens * CHARS_PER_TOKEN
+    return (_FILLER * (chars // len(_FILLER) + 1))[:chars].strip()
+
+
+def _sample_value(spec: dict):
+    kind = spec.get("type")
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "array":
+        return [_sample_value(spec.get("items", {}))]
+    if kind == "object":
+        return {}
+    return _text(profile.field_tokens)
+
+
+class StubChatGroq(BaseChatModel):
+    """
+    Drop-in replacement for ChatGroq in core/model/model.py. Accepts the
+    same constructor settings and ignores the ones that only matter to Groq.
+    """
+
+    model_config = ConfigDict(populate_by_name=True, extra="ignore")
+
+    model_name: str = Field(default="stub", alias="model")
+    temperature: float = 0.0
+    max_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+    max_retries: int = 0
+    reasoning_format: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-groq"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+    # -------------------------------
+    # Replies
+    # -------------------------------
+    def _reply(self, messages, tools=None, tool_choice=None) -> AIMessage:
+        if tools and tool_choice:
+            # with_structured_output(): fill the forced tool's schema
+            function = tools[0]["function"]
+            properties = function["parameters"].get("properties", {})
+            args = {name: _sample_value(spec) for name, spec in properties.items()}
+            return self._tool_call(function["name"], args)
+
+        if tools and not any(isinstance(m, ToolMessage) for m in messages):
+            # Chatbot with the RAG tool bound: always retrieve first
+            return self._tool_call(
+                tools[0]["function"]["name"], {"query": messages[-1].content}
+            )
+
+        if any(
+            isinstance(m, SystemMessage) and '"YES" or "NO"' in m.content
+            for m in messages
+        ):
+            return AIMessage(content="YES")
+
+        return AIMessage(content=_text(profile.answer_tokens))
+
+    @staticmethod
+    def _tool_call(name: str, args: dict) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": f"call_{next(_call_ids)}"}],
+        )
+
+    def _result(self, messages, message: AIMessage) -> ChatResult:
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(
+            message.content or str([call["args"] for call in message.tool_calls])
+        )
+        message.response_metadata = {"model_name": self.model_name}
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _latency(self, message: AIMessage) -> float:
+        return (
+            profile.first_token_seconds
+            + message.usage_metadata["output_tokens"] / profile.tokens_per_second
+        )
+
+    # -------------------------------
+    # BaseChatModel hooks
+    # -------------------------------
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        message = self._reply(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        result = self._result(messages, message)
+        time.sleep(self._latency(message))
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        message = self._reply(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        result = self._result(messages, message)
+        await asyncio.sleep(self._latency(message))
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        message = self._reply(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        result = self._result(messages, message)
+        await asyncio.sleep(profile.first_token_seconds)
+
+        width = profile.stream_chunk_tokens * CHARS_PER_TOKEN
+        delay = profile.stream_chunk_tokens / profile.tokens_per_second
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            args = json.dumps(call["args"])
+            for start in range(0, len(args), width):
+                first = start == 0
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content="",
+                        tool_call_chunks=[
+                            {
+                                "name": call["name"] if first else None,
+                                "args": args[start : start + width],
+                                "id": call["id"] if first else None,
+                                "index": 0,
+                            }
+                        ],
+                    )
+                )
+                await asyncio.sleep(delay)
+        else:
+            for start in range(0, len(message.content), width):
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content=message.content[start : start + width]
+                    )
+                )
+                await asyncio.sleep(delay)
+
+        # Groq reports usage on the final chunk
+        final = result.generations[0].message
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                response_metadata=final.response_metadata,
+                usage_metadata=final.usage_metadata,
+            )
+        )
@@ -0,0 +1,73 @@
+# ============================================================
+# 📚 Stub RAG Service
+# Loopback HTTP server answering POST /api/similarity-search/ with canned
+# transcript chunks after a fixed delay, in the RAG service's reply shape.
+# ============================================================
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNKS = [
+    "Patient reports a persistent dry cough for three weeks, worse at night.",
+    "No fever. History of hypertension, managed with lisinopril 10 mg daily.",
+    "Non-smoker. Mother has a history of type 2 diabetes.",
+    "Lungs clear on auscultation. Blood pressure 138/86.",
+]
+
+
+class _SimilaritySearchHandler(BaseHTTPRequestHandler):
+    latency_seconds = 0.02
+    top_k = 3
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.rstrip("/") != "/api/similarity-search":
+            self.send_error(404)
+            return
+
+        time.sleep(self.latency_seconds)
+        body = json.dumps({"data": CHUNKS[: self.top_k]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the benchmark output clean
+
+
+class StubRagServer:
+    """
+    Runs the stub on an ephemeral loopback port in a daemon thread.
+
+        with StubRagServer(latency_seconds=0.02) as server:
+            os.environ["RAG_API_URL"] = server.url
+    """
+
+    def __init__(self, latency_seconds: float = 0.02, top_k: int = 3):
+        handler = type(
+            "SimilaritySearchHandler",
+            (_SimilaritySearchHandler,),
+            {"latency_seconds": latency_seconds, "top_k": top_k},
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
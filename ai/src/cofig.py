@@ -2,4 +2,102 @@ server_config = {
     "check_api_key": False,  # Enable/disable API key validation
     "allow_custom_documents": True,  # Control custom document endpoints
     "log_level": "info",  # Add other server settings
+    "log_max_chars": 500,  # Longer log messages are truncated
+    "log_redact_phi": True,  # Mask emails, phone numbers, SSNs and dates in logs
+    "log_queue_size": 10000,  # Records beyond this are dropped and counted
+    "deadlines": {
+        "chat_seconds": 30,  # End-to-end budget for a chat answer
+        "document_seconds": 120,  # Budget for a synchronous document request
+        "job_document_seconds": 600,  # Budget for a queued document job
+        "llm_call_seconds": 120,  # Client-side timeout backstop for any Groq call
+        "retrieval_seconds": 5,  # Most of the chat budget RAG retrieval may use
+        "answer_reserve_seconds": 10,  # Chat budget always kept for the answer
+    },
+    "query_prefilter": True,  # Local lexicon check before the LLM validator
+    "chat_pipeline": "serial",  # "serial", "speculative" or "fused" chat graph
+    "dynamic_model_cache_size": 256,  # Compiled template models kept in memory
+    "structured_llm_cache_size": 128,  # Prepared structured-output runnables kept
+    "retrieval_cache": {
+        "max_entries": 1024,  # Cached (session_id, query) retrievals
+        "ttl_seconds": 300,  # How long a retrieval stays fresh
+    },
+    "batch_max_concurrency": 3,  # Document pipelines run at once per batch
+    "llm_governor": {
+        "enabled": True,  # Queue LLM calls locally to stay under Groq limits
+        "completion_tokens": 512,  # Initial completion estimate, then learned per node
+        "default": {
+            "requests_per_minute": 30,
+            "tokens_per_minute": 6000,
+            "max_concurrency": 4,
+        },
+        "models": {  # Match these to the Groq plan limits
+            "llama-3.1-8b-instant": {
+                "requests_per_minute": 30,
+                "tokens_per_minute": 6000,
+                "max_concurrency": 16,
+            },
+            "deepseek-r1-distill-llama-70b": {
+                "requests_per_minute": 30,
+                "tokens_per_minute": 6000,
+                "max_concurrency": 8,
+            },
+        },
+    },
+    "llm_hedging": {
+        "hedging_enabled": False,  # Fire a duplicate call for slow requests
+        "hedge_percentile": 95,  # Latency percentile after which to hedge
+        "fallback_enabled": True,  # Retry on the fallback tier on error/timeout
+        "fallback_percentile": 99,  # Tail latency used for the fallback timeout
+        "fallback_multiplier": 2.0,  # Give up after this multiple of that tail
+        "min_samples": 20,  # Samples needed before latency-driven decisions
+        "window": 500,  # Recent latencies kept per model
+        "fallback_models": {
+            "deepseek-r1-distill-llama-70b": {
+                "model": "llama-3.1-8b-instant",
+                "temperature": 0,
+            },
+        },
+    },
+    "job_queue": {
+        "max_size": 100,  # Queued jobs before submissions get 429
+        "workers": 4,  # Document generations run concurrently by the pool
+        "retention_seconds": 3600,  # How long finished job results are kept
+    },
+    "document_generation": {
+        "parallel_sections": False,  # Generate large templates in section groups
+        "group_size": 5,  # Sections per concurrent generation call
+        "max_concurrency": 4,  # Section groups generated at once
+        "group_retries": 1,  # Retries for groups that fail
+    },
+    "long_transcript": {
+        "threshold_tokens": 12000,  # Switch to map-reduce above this estimate
+        "chunk_tokens": 4000,  # Transcript tokens per map chunk
+        "overlap_tokens": 200,  # Tokens repeated between adjacent chunks
+        "max_concurrency": 4,  # Chunks extracted at once
+    },
+    "document_refinement": {
+        "mode": "full",  # "full", "selective" (flagged sections only) or "skip"
+        "min_section_chars": 10,  # Shorter sections are flagged for rewriting
+        "max_section_chars": 2500,  # Longer sections are flagged for tightening
+    },
+    "document_cache": {
+        "enabled": True,  # Reuse results for identical document requests
+        "max_entries": 256,  # In-memory tier size
+        "ttl_seconds": 3600,  # Entry lifetime for both tiers
+        "disk_path": None,  # SQLite file for the disk tier (None disables it)
+        "disk_max_entries": 5000,  # Rows kept in the disk tier
+    },
+    "rag_client": {
+        "max_connections": 20,  # Pooled connections to the RAG service
+        "max_keepalive_connections": 10,  # Idle connections kept warm
+        "keepalive_expiry": 30.0,  # Seconds an idle connection is kept
+        "connect_timeout": 3.0,  # Seconds to establish a connection
+        "read_timeout": 10.0,  # Seconds to wait for a similarity-search reply
+        "max_retries": 2,  # Retries on connection errors / 5xx responses
+        "backoff_base": 0.2,  # Base delay (seconds) for jittered backoff
+    },
+    "startup": {
+        "warm_up": True,  # Build clients and graphs at startup, not on 1st request
+        "budget_seconds": 3.0,  # Import + startup budget (benchmarks/startup_time.py)
+    },
 }
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from cofig import server_config
+from core.logger import get_logger
+
+logger = get_logger("deadline")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out during a stage."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+
+_overruns: dict[str, int] = {}
+
+
+def new_deadline(budget_seconds: float) -> float:
+    """Absolute (monotonic) deadline `budget_seconds` from now."""
+    return time.monotonic() + budget_seconds
+
+
+def remaining(deadline: float | None) -> float | None:
+    """Seconds left before `deadline`, or None when there is no deadline."""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+async def with_deadline(stage: str, deadline: float | None, awaitable):
+    """
+    Awaits `awaitable` within the time left on the request deadline,
+    cancelling it and raising DeadlineExceeded(stage) when the budget runs out.
+    """
+    budget = remaining(deadline)
+    if budget is not None and budget <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        _record_overrun(stage)
+        raise DeadlineExceeded(stage)
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=budget)
+    except asyncio.TimeoutError:
+        _record_overrun(stage)
+        raise DeadlineExceeded(stage)
+
+
+def request_deadline(kind: str) -> float:
+    """Deadline for a new request of `kind` using server_config budgets."""
+    return new_deadline(server_config["deadlines"][f"{kind}_seconds"])
+
+
+def _record_overrun(stage: str):
+    _overruns[stage] = _overruns.get(stage, 0) + 1
+    logger.warning("⏱️ Deadline exceeded during %s", stage)
+
+
+def deadline_overrun_stats() -> dict:
+    """Budget overrun counts per stage."""
+    return dict(_overruns)
@@ -0,0 +1,131 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+
+from cofig import server_config
+
+# Request id of the request being handled, set by the ASGI middleware
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Identifiers that must never leave the process in log lines
+PHI_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[EMAIL]"),
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[SSN]"),
+    (re.compile(r"\+?\d[\d\s().-]{8,}\d"), "[PHONE]"),
+    (re.compile(r"\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b"), "[DATE]"),
+]
+
+
+class RedactingFilter(logging.Filter):
+    """Redacts PHI-like identifiers and truncates large payloads in log messages."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if server_config["log_redact_phi"]:
+            for pattern, replacement in PHI_PATTERNS:
+                message = pattern.sub(replacement, message)
+
+        limit = server_config["log_max_chars"]
+        if len(message) > limit:
+            message = f"{message[:limit]}… [truncated {len(message) - limit} chars]"
+
+        record.msg, record.args = message, None
+        # Captured here because the listener thread has no request context
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line for the log collector."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drops and counts records when the queue is full instead of blocking."""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _stats["dropped"] += 1
+
+
+_log_queue: queue.Queue = queue.Queue(server_config["log_queue_size"])
+_listener: logging.handlers.QueueListener | None = None
+_configured = False
+_stats = {"dropped": 0}
+
+
+def configure_logging():
+    """
+    Routes the "clinico" logger through a bounded queue so request handlers
+    only enqueue records. Starts no threads, so it is safe at import time in
+    a process that forks workers afterwards.
+    """
+    global _configured
+    if _configured:
+        return
+
+    queue_handler = DroppingQueueHandler(_log_queue)
+    # Redact on the caller side so raw PHI never enters the queue
+    queue_handler.addFilter(RedactingFilter())
+
+    root = logging.getLogger("clinico")
+    root.setLevel(server_config["log_level"].upper())
+    root.addHandler(queue_handler)
+    root.propagate = False
+    _configured = True
+
+
+def start_logging():
+    """
+    Starts the background thread that formats queued records and writes them
+    to stdout. Called from each worker's lifespan, after any fork.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    configure_logging()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(_log_queue, stream_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flushes queued records and stops the background writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    """Records dropped because the log queue was full."""
+    return dict(_stats)
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(f"clinico.{name}")
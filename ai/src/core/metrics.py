@@ -0,0 +1,198 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+
+# Graph node currently executing, so LLM and RAG metrics can be attributed to it
+current_node = contextvars.ContextVar("current_node", default="none")
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+_lock = threading.Lock()
+_metrics: dict = {}
+_stats_sources: dict[str, tuple] = {}
+
+
+# -------------------------------
+# Metric Types
+# -------------------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key + (("le", str(bound)),), cumulative
+            yield f"{self.name}_bucket", key + (("le", "+Inf"),), count
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, count
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _metrics.setdefault(name, Counter(name, help_text))
+
+
+def histogram(name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+    return _metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+
+# -------------------------------
+# Shared Instruments
+# -------------------------------
+node_latency = histogram(
+    "clinico_node_latency_seconds", "LangGraph node latency by graph and node"
+)
+node_errors = counter("clinico_node_errors_total", "LangGraph node failures")
+llm_latency = histogram(
+    "clinico_llm_latency_seconds", "LLM call latency by model and node"
+)
+llm_tokens = counter(
+    "clinico_llm_tokens_total", "LLM tokens by model, node and type (input/output)"
+)
+llm_errors = counter("clinico_llm_errors_total", "Failed LLM calls by model and node")
+rag_latency = histogram("clinico_rag_latency_seconds", "RAG similarity-search latency")
+rag_errors = counter("clinico_rag_errors_total", "Failed RAG similarity searches")
+
+
+def instrument_node(graph: str, name: str, node):
+    """Wraps an async LangGraph node to record its latency and failures."""
+    # functools.wraps exposes the node's signature, so LangGraph passes
+    # `config` exactly when the node (e.g. a @traceable one) accepts it
+    accepts_config = "config" in inspect.signature(node).parameters
+
+    @functools.wraps(node)
+    async def wrapper(state, config=None):
+        token = current_node.set(name)
+        started = time.perf_counter()
+        try:
+            if accepts_config:
+                return await node(state, config=config)
+            return await node(state)
+        except Exception:
+            node_errors.inc(graph=graph, node=name)
+            raise
+        finally:
+            node_latency.observe(time.perf_counter() - started, graph=graph, node=name)
+            current_node.reset(token)
+
+    return wrapper
+
+
+def record_llm_call(model: str, seconds: float, usage: dict = None, error=False):
+    """Records one LLM call; `usage` holds the reported input/output tokens."""
+    node = current_node.get()
+    if error:
+        llm_errors.inc(model=model, node=node)
+        return
+    llm_latency.observe(seconds, model=model, node=node)
+    if usage:
+        llm_tokens.inc(usage["input_tokens"], model=model, node=node, type="input")
+        llm_tokens.inc(usage["output_tokens"], model=model, node=node, type="output")
+
+
+# -------------------------------
+# Stats Sources & Exposition
+# -------------------------------
+def register_stats(prefix: str, stats_fn, label: str = None, counters=()):
+    """
+    Exports a module's stats dict as gauges named clinico_<prefix>_<key>.
+    Keys listed in `counters` (nested keys joined with "_") only ever grow
+    and are exported as counters named clinico_<prefix>_<key>_total.
+    With `label`, stats_fn returns {label_value: {key: number}} instead; a
+    tuple of label names takes tuple label values.
+    Registering a prefix again replaces the previous source.
+    """
+    _stats_sources[prefix] = (stats_fn, label, frozenset(counters))
+
+
+def _flatten(stats: dict, name: str):
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}_{key}")
+        elif isinstance(value, (int, float)):
+            yield f"{name}_{key}", value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(name: str, key: tuple, value) -> str:
+    labels = ",".join(f'{label}="{_escape(v)}"' for label, v in key)
+    return f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+
+
+def render_metrics() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric in _metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_format(*sample) for sample in metric.samples())
+
+    stats_metrics: dict[str, tuple[str, list[str]]] = {}
+    for prefix, (stats_fn, label, counters) in _stats_sources.items():
+        stats = stats_fn()
+        groups = stats.items() if label else [(None, stats)]
+        for label_value, group in groups:
+            if isinstance(label, tuple):
+                key = tuple(zip(label, label_value))
+            else:
+                key = ((label, label_value),) if label else ()
+            for name, value in _flatten(group, f"clinico_{prefix}"):
+                kind = "gauge"
+                if name.removeprefix(f"clinico_{prefix}_") in counters:
+                    kind = "counter"
+                    if not name.endswith("_total"):
+                        name = f"{name}_total"
+                _, samples = stats_metrics.setdefault(name, (kind, []))
+                samples.append(_format(name, key, value))
+
+    for name, (kind, samples) in stats_metrics.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    return "\n".join(lines) + "\n"
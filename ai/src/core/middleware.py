@@ -0,0 +1,86 @@
+import hmac
+import json
+import time
+import uuid
+
+from core.logger import get_logger, request_id_var
+
+logger = get_logger("access")
+
+UNAUTHORIZED_BODY = json.dumps({"detail": "Unauthorized: Invalid API Key"}).encode()
+
+
+class ClinicoMiddleware:
+    """
+    Single pure-ASGI middleware for every HTTP request:
+    - constant-time API key check (401 JSON response on mismatch)
+    - X-Request-ID assignment (reuses a valid incoming id)
+    - Server-Timing header with time to response start
+    - access log line once the last body chunk is sent
+
+    It only wraps `send`, so streaming and SSE responses pass through
+    untouched, unlike BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app, api_key: str | None, check_api_key: bool = True):
+        self.app = app
+        self.api_key = (api_key or "").encode()
+        self.check_api_key = check_api_key
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64]
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"server-timing", f"app;dur={elapsed_ms:.1f}".encode()),
+                ]
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                logger.info(
+                    "🌐 %s %s %d %.1fms",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    (time.perf_counter() - started) * 1000,
+                )
+            await send(message)
+
+        try:
+            if self.check_api_key and not self._authorized(headers):
+                await self._unauthorized(send_wrapper)
+                return
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+    def _authorized(self, headers: dict) -> bool:
+        provided = headers.get(b"clinico_ai_api_key", b"")
+        return bool(self.api_key) and hmac.compare_digest(provided, self.api_key)
+
+    @staticmethod
+    async def _unauthorized(send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(UNAUTHORIZED_BODY)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": UNAUTHORIZED_BODY})
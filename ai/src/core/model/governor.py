@@ -0,0 +1,209 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.runnables.config import ensure_config, merge_configs
+
+from cofig import server_config
+from core.model.tokens import estimate_tokens
+from core.metrics import current_node, record_llm_call
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most `capacity` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float) -> float:
+        """Charges `amount`, capped at the capacity; returns what was charged."""
+        self._refill()
+        charged = min(amount, self.capacity)
+        self.available -= charged
+        return charged
+
+    def adjust(self, amount: float):
+        """Charges (positive) or refunds (negative) units after the fact."""
+        self._refill()
+        self.available = min(self.capacity, self.available - amount)
+
+
+class ModelGovernor:
+    """
+    Admission control for one provider model: requests-per-minute and
+    estimated tokens-per-minute buckets plus a concurrency cap. Waiters are
+    admitted strictly in arrival order (asyncio.Lock is FIFO-fair).
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_concurrency):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._admission = asyncio.Lock()
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self.stats = {
+            "requests": 0,
+            "waiting": 0,
+            "estimated_tokens": 0,
+            "actual_tokens": 0,
+            "queue_seconds_total": 0.0,
+            "queue_seconds_max": 0.0,
+        }
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Waits for admission; yields the tokens actually charged for the call."""
+        queued_at = time.monotonic()
+        self.stats["waiting"] += 1
+        try:
+            async with self._admission:
+                while True:
+                    delay = max(
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens),
+                    )
+                    if delay == 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.requests.consume(1)
+                charged_tokens = self.tokens.consume(estimated_tokens)
+                await self._concurrency.acquire()
+        finally:
+            self.stats["waiting"] -= 1
+
+        queued = time.monotonic() - queued_at
+        self.stats["requests"] += 1
+        self.stats["estimated_tokens"] += estimated_tokens
+        self.stats["queue_seconds_total"] += queued
+        self.stats["queue_seconds_max"] = max(self.stats["queue_seconds_max"], queued)
+        try:
+            yield charged_tokens
+        finally:
+            self._concurrency.release()
+
+    def settle(self, charged_tokens: float, actual_tokens: int):
+        """
+        Corrects the token bucket once the provider reports real usage. Calls
+        larger than the bucket were only charged its capacity up front, so the
+        rest is charged here and later calls wait for it to refill.
+        """
+        self.tokens.adjust(actual_tokens - charged_tokens)
+        self.stats["actual_tokens"] += actual_tokens
+
+
+_governors: dict[str, ModelGovernor] = {}
+# (model, node) → moving average of reported completion tokens, so one-token
+# YES/NO verdicts aren't charged like full document generations
+_completion_estimates: dict[tuple, float] = {}
+
+
+def get_governor(model: str) -> ModelGovernor:
+    governor = _governors.get(model)
+    if governor is None:
+        settings = server_config["llm_governor"]
+        limits = settings["models"].get(model, settings["default"])
+        governor = ModelGovernor(
+            limits["requests_per_minute"],
+            limits["tokens_per_minute"],
+            limits["max_concurrency"],
+        )
+        _governors[model] = governor
+    return governor
+
+
+def _estimate_input_tokens(llm_input) -> int:
+    if isinstance(llm_input, str):
+        return estimate_tokens(llm_input)
+    return sum(estimate_tokens(str(message.content)) for message in llm_input)
+
+
+def _estimate_completion_tokens(key: tuple) -> float:
+    return _completion_estimates.get(
+        key, server_config["llm_governor"]["completion_tokens"]
+    )
+
+
+def _learn_completion_tokens(key: tuple, output_tokens: int):
+    previous = _completion_estimates.get(key)
+    _completion_estimates[key] = (
+        output_tokens if previous is None else 0.8 * previous + 0.2 * output_tokens
+    )
+
+
+async def governed_ainvoke(
+    model: str, runnable, llm_input, config=None, on_admitted=None
+):
+    """
+    Invokes an LLM runnable once the shared governor for `model` admits it.
+    Every Groq call in the agents goes through here so bursts queue locally
+    instead of tripping provider rate limits and retry storms. The token
+    charge is estimated up front and settled against the reported usage.
+    `on_admitted` is called when the call leaves the queue.
+    """
+    settings = server_config["llm_governor"]
+    if not settings["enabled"]:
+        if on_admitted:
+            on_admitted()
+        response, _ = await _measured_ainvoke(model, runnable, llm_input, config)
+        return response
+
+    key = (model, current_node.get())
+    estimated = _estimate_input_tokens(llm_input) + int(
+        _estimate_completion_tokens(key)
+    )
+    governor = get_governor(model)
+    async with governor.slot(estimated) as charged:
+        if on_admitted:
+            on_admitted()
+        response, usage = await _measured_ainvoke(model, runnable, llm_input, config)
+    if usage:
+        governor.settle(charged, usage["input_tokens"] + usage["output_tokens"])
+        _learn_completion_tokens(key, usage["output_tokens"])
+    return response
+
+
+async def _measured_ainvoke(model: str, runnable, llm_input, config):
+    """Returns the response and its summed usage (None if not reported)."""
+    usage_handler = UsageMetadataCallbackHandler()
+    # ensure_config() picks up the parent run's callbacks from the context, so
+    # the handler is added to them rather than replacing tracing and streaming
+    config = merge_configs(ensure_config(config), {"callbacks": [usage_handler]})
+    started = time.perf_counter()
+    try:
+        response = await runnable.ainvoke(llm_input, config=config)
+    except Exception:
+        record_llm_call(model, time.perf_counter() - started, error=True)
+        raise
+    seconds = time.perf_counter() - started
+
+    usage = None
+    if usage_handler.usage_metadata:
+        usage = {
+            key: sum(u[key] for u in usage_handler.usage_metadata.values())
+            for key in ("input_tokens", "output_tokens")
+        }
+    record_llm_call(model, seconds, usage)
+    return response, usage
+
+
+def governor_stats() -> dict:
+    """Per-model admission counters and queue times."""
+    return {model: dict(governor.stats) for model, governor in _governors.items()}
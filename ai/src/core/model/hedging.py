@@ -0,0 +1,187 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from cofig import server_config
+from core.model.governor import governed_ainvoke
+from core.metrics import current_node
+from core.logger import get_logger
+
+logger = get_logger("hedging")
+
+
+class LatencyHistogram:
+    """Rolling window of recent provider latencies for one model and stage."""
+
+    def __init__(self, window: int):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, percentile: float) -> float:
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+
+# Keyed by (model, graph node): one-token verdicts and full document
+# refinements on the same model have very different latency profiles
+_histograms: dict[tuple, LatencyHistogram] = {}
+_stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "fallbacks": 0}
+# Set by track_fallbacks(); a shared list so calls made in child tasks
+# (concurrent map chunks, deadline wrappers) still report back
+_used_fallbacks: ContextVar[list | None] = ContextVar("used_fallbacks", default=None)
+
+
+@contextmanager
+def track_fallbacks():
+    """Yields the list of fallback models used by calls made in this block."""
+    used = []
+    token = _used_fallbacks.set(used)
+    try:
+        yield used
+    finally:
+        _used_fallbacks.reset(token)
+
+
+def get_histogram(model: str) -> LatencyHistogram:
+    key = (model, current_node.get())
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = LatencyHistogram(server_config["llm_hedging"]["window"])
+        _histograms[key] = histogram
+    return histogram
+
+
+async def _timed_ainvoke(model: str, runnable, llm_input, admitted=None):
+    """
+    Runs one governed call and records its latency from admission onwards,
+    so time spent queued in the local governor is not counted as provider
+    latency. Sets the `admitted` event when the call leaves the queue.
+    """
+    started = None
+
+    def on_admitted():
+        nonlocal started
+        started = time.perf_counter()
+        if admitted is not None:
+            admitted.set()
+
+    result = await governed_ainvoke(model, runnable, llm_input, on_admitted=on_admitted)
+    get_histogram(model).record(time.perf_counter() - started)
+    return result
+
+
+async def _hedged_ainvoke(model: str, runnable, llm_input, give_up_after):
+    """
+    Runs the call and, once it has been at the provider for longer than the
+    configured latency percentile, fires one duplicate and keeps whichever
+    finishes first. Both budgets start when the primary is admitted: a
+    duplicate fired while it is still queued would only queue behind it.
+    """
+    settings = server_config["llm_hedging"]
+    histogram = get_histogram(model)
+    warmed_up = len(histogram) >= settings["min_samples"]
+
+    loop = asyncio.get_running_loop()
+    admitted = asyncio.Event()
+    primary = asyncio.create_task(_timed_ainvoke(model, runnable, llm_input, admitted))
+    tasks = [primary]
+    admission = asyncio.create_task(admitted.wait())
+
+    try:
+        await asyncio.wait([primary, admission], return_when=asyncio.FIRST_COMPLETED)
+        give_up_at = loop.time() + give_up_after if give_up_after else None
+
+        if settings["hedging_enabled"] and warmed_up and not primary.done():
+            hedge_delay = histogram.percentile(settings["hedge_percentile"])
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                _stats["hedges"] += 1
+                tasks.append(
+                    asyncio.create_task(_timed_ainvoke(model, runnable, llm_input))
+                )
+
+        error = None
+        while tasks:
+            timeout = give_up_at - loop.time() if give_up_at else None
+            if timeout is not None and timeout <= 0:
+                raise TimeoutError(f"{model} slower than its latency budget")
+            done, _ = await asyncio.wait(
+                tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise TimeoutError(f"{model} slower than its latency budget")
+            for task in done:
+                tasks.remove(task)
+                if task.exception() is None:
+                    if task is not primary:
+                        _stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        admission.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(admission, *tasks, return_exceptions=True)
+
+
+async def resilient_ainvoke(model: str, runnable, llm_input, fallback=None):
+    """
+    Invokes an LLM runnable with optional hedging and a fallback tier.
+
+    Args:
+        model: Model name of `runnable`, used for governing and latency stats
+        runnable: Primary LLM runnable
+        llm_input: Prompt string or message list
+        fallback: Optional (model, runnable) tried when the primary errors or
+            runs past a multiple of its own tail latency. A successful
+            fallback is reported to the enclosing track_fallbacks() block.
+    """
+    settings = server_config["llm_hedging"]
+    _stats["calls"] += 1
+
+    if fallback is None or not settings["fallback_enabled"]:
+        return await _hedged_ainvoke(model, runnable, llm_input, None)
+
+    histogram = get_histogram(model)
+    give_up_after = None
+    if len(histogram) >= settings["min_samples"]:
+        give_up_after = (
+            histogram.percentile(settings["fallback_percentile"])
+            * settings["fallback_multiplier"]
+        )
+
+    try:
+        return await _hedged_ainvoke(model, runnable, llm_input, give_up_after)
+    except Exception as e:
+        fallback_model, fallback_runnable = fallback
+        logger.warning("%s failed (%r), falling back to %s", model, e, fallback_model)
+        _stats["fallbacks"] += 1
+        result = await _timed_ainvoke(fallback_model, fallback_runnable, llm_input)
+        used = _used_fallbacks.get()
+        if used is not None:
+            used.append(fallback_model)
+        return result
+
+
+def hedging_stats() -> dict:
+    """Hedge/fallback counters and live latency percentiles per (model, node)."""
+    latencies = {
+        key: {
+            "samples": len(histogram),
+            "p50": histogram.percentile(50),
+            "p95": histogram.percentile(95),
+            "p99": histogram.percentile(99),
+        }
+        for key, histogram in _histograms.items()
+        if len(histogram)
+    }
+    return {**_stats, "latency_seconds": latencies}
@@ -1,5 +1,13 @@
 from pydantic import BaseModel, Field
 from typing import List, Type
+from collections import OrderedDict
+import threading
+
+from cofig import server_config
+
+_dynamic_models: OrderedDict = OrderedDict()
+_dynamic_models_lock = threading.Lock()
+_dynamic_model_stats = {"hits": 0, "misses": 0, "evictions": 0}
 
 
 class DocumentField(BaseModel):
@@ -18,6 +26,8 @@ def create_dynamic_model(
 ) -> Type[BaseModel]:
     """
     Creates a dynamic Pydantic model class based on a list of field definitions.
+    Identical templates (same model name and ordered label/description pairs)
+    return the same cached class, so its schema is only built once.
 
     Args:
         fields: List of DocumentField instances defining the model fields
@@ -26,6 +36,16 @@ def create_dynamic_model(
     Returns:
         A dynamically generated Pydantic model class
     """
+    key = (model_name, tuple((f.label, f.description) for f in fields))
+
+    with _dynamic_models_lock:
+        cached = _dynamic_models.get(key)
+        if cached is not None:
+            _dynamic_models.move_to_end(key)
+            _dynamic_model_stats["hits"] += 1
+            return cached
+        _dynamic_model_stats["misses"] += 1
+
     # Prepare the fields dictionary for the new model
     class_fields = {
         "__annotations__": {},
@@ -39,4 +59,16 @@ def create_dynamic_model(
 
     # Create the dynamic model class
     DynamicModel = type(model_name, (BaseModel,), class_fields)
+
+    with _dynamic_models_lock:
+        DynamicModel = _dynamic_models.setdefault(key, DynamicModel)
+        while len(_dynamic_models) > server_config["dynamic_model_cache_size"]:
+            _dynamic_models.popitem(last=False)
+            _dynamic_model_stats["evictions"] += 1
     return DynamicModel
+
+
+def dynamic_model_cache_stats() -> dict:
+    """Hit/miss counters and current size of the dynamic model cache."""
+    with _dynamic_models_lock:
+        return {**_dynamic_model_stats, "size": len(_dynamic_models)}
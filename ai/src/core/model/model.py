@@ -4,31 +4,121 @@
 
 
 from langchain_groq import ChatGroq
-import os
-from dotenv import load_dotenv
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import weakref
 
-load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
+from cofig import server_config
+from core.model.hedging import resilient_ainvoke
 
-if "GROQ_API_KEY" not in os.environ:
-    os.environ["GROQ_API_KEY"] = groq_api_key
+DOCUMENT_MODEL_SETTINGS = {
+    "model": "deepseek-r1-distill-llama-70b",
+    "temperature": 0,
+    "reasoning_format": "parsed",
+}
 
-llm = ChatGroq(
-    model="deepseek-r1-distill-llama-70b",
-    temperature=0,
-    max_tokens=None,
-    reasoning_format="parsed",
-    timeout=None,
-    max_retries=2,
-)
+# -------------------------------
+# Shared Clients & Structured Runnables
+# -------------------------------
+_lock = threading.Lock()
+_chat_models: dict[tuple, ChatGroq] = {}
+_structured_llms: OrderedDict = OrderedDict()
+_schema_fingerprints = weakref.WeakKeyDictionary()
+_structured_llm_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _settings_key(settings: dict) -> tuple:
+    return tuple(sorted(settings.items()))
+
+
+def schema_fingerprint(schema) -> str:
+    """Stable hash of a Pydantic model's name and JSON schema."""
+    fingerprint = _schema_fingerprints.get(schema)
+    if fingerprint is None:
+        encoded = json.dumps(
+            [schema.__name__, schema.model_json_schema()], sort_keys=True
+        )
+        fingerprint = hashlib.sha256(encoded.encode()).hexdigest()
+        _schema_fingerprints[schema] = fingerprint
+    return fingerprint
+
+
+def get_chat_model(**settings) -> ChatGroq:
+    """
+    Returns the process-wide ChatGroq client for the given settings,
+    creating it on first use so its HTTP connection pool is shared.
+    """
+    key = _settings_key(settings)
+    with _lock:
+        chat_model = _chat_models.get(key)
+        if chat_model is None:
+            chat_model = ChatGroq(
+                max_tokens=None,
+                timeout=server_config["deadlines"]["llm_call_seconds"],
+                # Retries would bypass the governor's buckets; failures go to
+                # the fallback tier instead (core/model/hedging.py)
+                max_retries=0,
+                **settings,
+            )
+            _chat_models[key] = chat_model
+        return chat_model
+
+
+def get_structured_llm(schema, **settings):
+    """
+    Returns a cached `with_structured_output(schema)` runnable built on the
+    shared client for `settings`, kept in a bounded LRU registry.
+    """
+    settings = settings or DOCUMENT_MODEL_SETTINGS
+    key = (schema_fingerprint(schema), _settings_key(settings))
+
+    with _lock:
+        runnable = _structured_llms.get(key)
+        if runnable is not None:
+            _structured_llms.move_to_end(key)
+            _structured_llm_stats["hits"] += 1
+            return runnable
+        _structured_llm_stats["misses"] += 1
+
+    runnable = get_chat_model(**settings).with_structured_output(schema)
+
+    with _lock:
+        _structured_llms[key] = runnable
+        while len(_structured_llms) > server_config["structured_llm_cache_size"]:
+            _structured_llms.popitem(last=False)
+            _structured_llm_stats["evictions"] += 1
+    return runnable
+
+
+def structured_llm_cache_stats() -> dict:
+    """Hit/miss counters and current size of the structured runnable registry."""
+    with _lock:
+        return {**_structured_llm_stats, "size": len(_structured_llms)}
 
 
 def generate_llm(document_type):
-    return ChatGroq(
-        model="deepseek-r1-distill-llama-70b",
-        temperature=0,
-        max_tokens=None,
-        reasoning_format="parsed",
-        timeout=None,
-        max_retries=2,
-    ).with_structured_output(document_type)
+    return get_structured_llm(document_type, **DOCUMENT_MODEL_SETTINGS)
+
+
+async def generate_document(document_type, prompt, tags=None):
+    """
+    Runs the structured document model through the shared LLM governor,
+    with hedging and the configured fallback tier. `tags` are attached to the
+    LLM runs so stream consumers can tell intermediate calls apart.
+    """
+    model = DOCUMENT_MODEL_SETTINGS["model"]
+    runnable = generate_llm(document_type)
+    fallback = None
+    fallback_settings = server_config["llm_hedging"]["fallback_models"].get(model)
+    if fallback_settings:
+        fallback = (
+            fallback_settings["model"],
+            get_structured_llm(document_type, **fallback_settings),
+        )
+    if tags:
+        runnable = runnable.with_config(tags=tags)
+        if fallback:
+            fallback = (fallback[0], fallback[1].with_config(tags=tags))
+    return await resilient_ainvoke(model, runnable, prompt, fallback=fallback)
@@ -0,0 +1,9 @@
+import math
+
+# Llama-family tokenizers average roughly four characters per English token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for chunking and rate budgeting."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,32 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key onto one execution.
+    Every waiter receives the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._in_flight: dict = {}
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    async def run(self, key, coroutine_factory):
+        task = self._in_flight.get(key)
+        if task is None:
+            self._stats["executions"] += 1
+            task = asyncio.ensure_future(coroutine_factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self._stats["coalesced"] += 1
+
+        # Shield so one caller disconnecting does not cancel the shared work
+        return await asyncio.shield(task)
+
+    def in_flight(self, key) -> bool:
+        """Whether a call to run(key, ...) now would join an existing execution."""
+        return key in self._in_flight
+
+    def stats(self) -> dict:
+        return {**self._stats, "in_flight": len(self._in_flight)}
@@ -0,0 +1,142 @@
+# ============================================================
+# 🧵 Clinico AI Job Queue
+# In-process queue and worker pool for long document generations
+# ============================================================
+
+import asyncio
+import time
+import uuid
+
+from cofig import server_config
+from core.logger import get_logger
+
+logger = get_logger("jobs")
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobQueue:
+    """
+    Bounded asyncio queue drained by a fixed pool of worker tasks.
+    Finished jobs are kept for `retention_seconds` so clients can poll them.
+    """
+
+    def __init__(self, max_size: int, workers: int, retention_seconds: float):
+        self.max_size = max_size
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._jobs: dict[str, dict] = {}
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    # -------------------------------
+    # Lifecycle
+    # -------------------------------
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    # -------------------------------
+    # Public Interface
+    # -------------------------------
+    def submit(self, coroutine_factory) -> str:
+        """Queues a job and returns its id; raises JobQueueFull at capacity."""
+        self._purge_expired()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        try:
+            self._queue.put_nowait((job, coroutine_factory))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            raise JobQueueFull("Job queue is full, retry later")
+
+        self._jobs[job_id] = job
+        self._stats["submitted"] += 1
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        started = self._stats["completed"] + self._stats["failed"]
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "running": sum(job["status"] == "running" for job in self._jobs.values()),
+            "wait_seconds_avg": (
+                self._stats["wait_seconds_total"] / started if started else 0.0
+            ),
+        }
+
+    # -------------------------------
+    # Internals
+    # -------------------------------
+    async def _worker(self):
+        while True:
+            job, coroutine_factory = await self._queue.get()
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            wait = job["started_at"] - job["submitted_at"]
+            self._stats["wait_seconds_total"] += wait
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+
+            try:
+                job["result"] = await coroutine_factory()
+                job["status"] = "completed"
+                self._stats["completed"] += 1
+            except asyncio.CancelledError:
+                job["status"] = "failed"
+                job["error"] = "Server shutting down"
+                raise
+            except Exception as e:
+                logger.error("❌ Job %s failed: %s", job["job_id"], e)
+                job["status"] = "failed"
+                job["error"] = str(e)
+                self._stats["failed"] += 1
+            finally:
+                job["finished_at"] = time.time()
+                self._queue.task_done()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_queue = JobQueue(
+    max_size=server_config["job_queue"]["max_size"],
+    workers=server_config["job_queue"]["workers"],
+    retention_seconds=server_config["job_queue"]["retention_seconds"],
+)
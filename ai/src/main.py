@@ -6,14 +6,19 @@
 # -------------------------------
 # 🔹 Standard Library Imports
 # -------------------------------
+import json
 import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
 # -------------------------------
 # 🔹 Third-Party Library Imports
 # -------------------------------
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import uvicorn
@@ -23,16 +28,46 @@ import uvicorn
 # -------------------------------
 from cofig import server_config
 
-from core.model.llm_schemas import create_dynamic_model
-from agents.document_agent.document_agent import invoke_document_agent
-from agents.chat_agent.chat_agent import invoke_chat_agent
+from core.model.llm_schemas import create_dynamic_model, dynamic_model_cache_stats
+from core.model.model import structured_llm_cache_stats
+from core.model.governor import governor_stats
+from core.model.hedging import hedging_stats
+from core.metrics import register_stats, render_metrics
+from core.logger import get_logger, logging_stats, start_logging, stop_logging
+from core.middleware import ClinicoMiddleware
+from agents.document_agent.document_agent import (
+    get_document_agent,
+    invoke_document_agent,
+    invoke_document_agent_batch,
+    astream_document_agent,
+    document_requests,
+)
+from agents.document_agent.document_cache import document_cache_stats
+from agents.document_agent.section_quality import refinement_stats
+from agents.document_agent.tools.long_transcript import long_transcript_stats
+from agents.chat_agent.chat_agent import (
+    get_chat_app,
+    get_llm_with_tools,
+    invoke_chat_agent,
+    astream_chat_agent,
+    chat_requests,
+)
+from agents.chat_agent.query_prefilter import prefilter_stats
+from service.rag_service import (
+    close_rag_client,
+    get_rag_client,
+    invalidate_session_contexts,
+    retrieval_cache_stats,
+)
+from jobs import job_queue, JobQueueFull
+from core.deadline import DeadlineExceeded, request_deadline, deadline_overrun_stats
 
 
 # ============================================================
-# ⚙️ Environment Setup
+# ⚙️ Logging Setup
 # ============================================================
-load_dotenv()
-CLINICO_AI_API_KEY = os.getenv("CLINICO_AI_API_KEY")
+logger = get_logger("server")
+_startup_stats = {"warm_up_seconds": 0.0}
 
 
 # ============================================================
@@ -62,6 +97,22 @@ class DocumentData(BaseModel):
     doctor_suggestions: str
 
 
+class DocumentTemplate(BaseModel):
+    """Schema for one document requested in a batch."""
+
+    document_type: str
+    fields: List[DocumentField]
+    doctor_suggestions: Optional[str] = None
+
+
+class BatchDocumentData(BaseModel):
+    """Schema for generating several documents from one transcript."""
+
+    transcript: str
+    documents: List[DocumentTemplate]
+    doctor_suggestions: str = ""
+
+
 class DocumentDataNonCustom(BaseModel):
     """Schema for non-custom document generation."""
 
@@ -76,59 +127,59 @@ class QueryRequest(BaseModel):
     session_id: str
 
 
-# ============================================================
-# 🚀 FastAPI App Initialization
-# ============================================================
-app = FastAPI(title="Clinico AI Backend", version="1.0.0")
+class SessionRequest(BaseModel):
+    """Schema for session-scoped maintenance requests."""
+
+    session_id: str
 
 
 # ============================================================
-# 🧩 Middleware
+# 🧠 API Endpoints
 # ============================================================
+router = APIRouter()
 
 
-@app.middleware("http")
-async def check_api_key(request: Request, call_next):
-    """
-    Middleware to verify API Key authentication for all requests.
-    Skips check if disabled in server_config.
-    """
-    if not server_config.get("check_api_key", True):
-        return await call_next(request)
-
-    api_key = request.headers.get("CLINICO_AI_API_KEY")
-    if api_key != CLINICO_AI_API_KEY:
-        raise HTTPException(status_code=401, detail="Unauthorized: Invalid API Key")
-
-    return await call_next(request)
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus exposition of node, LLM, RAG, cache and queue metrics."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
-@app.middleware("http")
-async def log_incoming_request(request: Request, call_next):
-    """Logs every incoming request for monitoring."""
-    print(f"[INFO] 🌐 Incoming request: {request.url.path}")
-    response = await call_next(request)
-    return response
+def format_sse(event: str, data) -> str:
+    """Encodes one server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
 
 
-# ============================================================
-# 🧠 API Endpoints
-# ============================================================
+def _create_template_model(fields, document_type: str):
+    """
+    Builds the template's model for handlers that validate before they start
+    streaming or queueing, turning a bad template into a 400.
+    """
+    try:
+        return create_dynamic_model(fields, f"Dynamic{document_type.capitalize()}Model")
+    except Exception as e:
+        logger.error("❌ Invalid document template: %s", e)
+        raise HTTPException(
+            status_code=400, detail=f"Invalid document template: {str(e)}"
+        )
 
 
-@app.post("/api/generate-custom-document")
-def handle_custom_document_generation(document_data: DocumentData):
+@router.post("/api/generate-custom-document")
+async def handle_custom_document_generation(document_data: DocumentData):
     """
     Generates a custom medical document based on a transcript,
     provided fields, and doctor suggestions.
     """
+    deadline = request_deadline("document")
     try:
         transcript = document_data.transcript
         document_type = document_data.document_type.lower()
         doctor_suggestions = document_data.doctor_suggestions
 
-        print(f"[INFO] 🩺 Generating custom document for type: {document_type}")
-        print(f"[INFO] Doctor's suggestions: {doctor_suggestions}")
+        logger.info("🩺 Generating custom document for type: %s", document_type)
+        logger.debug("Doctor's suggestions: %s", doctor_suggestions)
 
         # Create dynamic Pydantic model from provided fields
         custom_model = create_dynamic_model(
@@ -137,14 +188,13 @@ def handle_custom_document_generation(document_data: DocumentData):
 
         # Generate the document using the transcript and model
 
-        document = invoke_document_agent(
-            transcript, custom_model, document_type, doctor_suggestions
+        document = await invoke_document_agent(
+            transcript, custom_model, document_type, doctor_suggestions, deadline
         )
 
         timestamp = datetime.now(timezone.utc).isoformat()
 
-        print("[INFO] ✅ Custom document generated successfully.")
-        print(f"[INFO] Document content:\n{document}")
+        logger.info("✅ Custom document generated successfully.")
 
         return {
             "status": "success",
@@ -155,33 +205,421 @@ def handle_custom_document_generation(document_data: DocumentData):
             },
         }
 
+    except DeadlineExceeded as e:
+        logger.error("⏱️ Document generation timed out: %s", e)
+        raise HTTPException(status_code=504, detail=str(e))
+
     except Exception as e:
-        print(f"[ERROR] ❌ Document generation failed: {str(e)}")
+        logger.error("❌ Document generation failed: %s", e)
         raise HTTPException(
             status_code=400, detail=f"Failed to generate custom document: {str(e)}"
         )
 
 
-@app.post("/api/generate-answer")
-def handle_answer_generation(request: QueryRequest):
+@router.post("/api/generate-custom-documents/batch")
+async def handle_batch_document_generation(batch_data: BatchDocumentData):
+    """
+    Generates several custom documents from one transcript concurrently.
+    Each document succeeds or fails independently.
+    """
+    logger.info("🩺 Generating batch of %d documents", len(batch_data.documents))
+
+    documents, invalid = [], {}
+    for index, template in enumerate(batch_data.documents):
+        document_type = template.document_type.lower()
+        try:
+            custom_model = create_dynamic_model(
+                template.fields, f"Dynamic{document_type.capitalize()}Model"
+            )
+        except Exception as e:
+            # A bad template fails only its own entry, not the whole batch
+            invalid[index] = e
+            custom_model = None
+        documents.append(
+            {
+                "document_type": document_type,
+                "custom_model": custom_model,
+                "doctor_suggestions": (
+                    template.doctor_suggestions
+                    if template.doctor_suggestions is not None
+                    else batch_data.doctor_suggestions
+                ),
+            }
+        )
+
+    generated = iter(
+        await invoke_document_agent_batch(
+            batch_data.transcript,
+            [
+                document
+                for document in documents
+                if document["custom_model"] is not None
+            ],
+            request_deadline("document"),
+        )
+    )
+    results = [
+        invalid[index] if index in invalid else next(generated)
+        for index in range(len(documents))
+    ]
+
+    data = []
+    for document, result in zip(documents, results):
+        if isinstance(result, Exception):
+            logger.error("❌ Batch document failed: %s", result)
+            data.append(
+                {
+                    "document_type": document["document_type"].upper(),
+                    "status": "error",
+                    "error": f"Failed to generate custom document: {str(result)}",
+                }
+            )
+        else:
+            data.append(
+                {
+                    "document_type": document["document_type"].upper(),
+                    "status": "success",
+                    "generated_document": result,
+                }
+            )
+
+    logger.info("✅ Batch document generation finished.")
+    return {
+        "status": "success",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "data": data,
+    }
+
+
+@router.post("/api/generate-custom-document/stream")
+async def handle_custom_document_generation_stream(document_data: DocumentData):
+    """
+    Streaming variant of /api/generate-custom-document. Emits each draft
+    section as soon as it is generated, then the refined document.
+    """
+    document_type = document_data.document_type.lower()
+    logger.info("🩺 Streaming custom document for type: %s", document_type)
+
+    custom_model = _create_template_model(document_data.fields, document_type)
+    deadline = request_deadline("document")
+
+    async def event_stream():
+        try:
+            async for event in astream_document_agent(
+                document_data.transcript,
+                custom_model,
+                document_type,
+                document_data.doctor_suggestions,
+                deadline,
+            ):
+                if event["event"] == "done":
+                    event["data"] = {
+                        "document_type": document_type.upper(),
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "generated_document": event["data"],
+                    }
+                yield format_sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error("❌ Document stream failed: %s", e)
+            yield format_sse("error", f"Failed to generate custom document: {str(e)}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/api/jobs/generate-custom-document", status_code=202)
+async def submit_custom_document_job(document_data: DocumentData):
+    """
+    Queues a custom document generation and returns a job id to poll.
+    Responds with 429 when the job queue is full.
+    """
+    document_type = document_data.document_type.lower()
+    custom_model = _create_template_model(document_data.fields, document_type)
+
+    async def generate():
+        document = await invoke_document_agent(
+            document_data.transcript,
+            custom_model,
+            document_type,
+            document_data.doctor_suggestions,
+            budget="job_document",
+        )
+        return {
+            "document_type": document_type.upper(),
+            "generated_document": document,
+        }
+
+    try:
+        job_id = job_queue.submit(generate)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    logger.info("🧵 Queued document job %s for type: %s", job_id, document_type)
+    return {"status": "queued", "job_id": job_id}
+
+
+@router.get("/api/jobs/stats")
+async def get_job_queue_stats():
+    """Queue depth, wait times and outcome counters for the job queue."""
+    return {"status": "success", "data": job_queue.stats()}
+
+
+def _get_job_or_404(job_id: str) -> dict:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Returns the status and timing of a queued document job."""
+    job = _get_job_or_404(job_id)
+    return {
+        "status": "success",
+        "data": {key: value for key, value in job.items() if key != "result"},
+    }
+
+
+@router.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Returns the generated document of a finished job.
+    Responds with 202 while the job is still queued or running.
+    """
+    job = _get_job_or_404(job_id)
+
+    if job["status"] == "failed":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to generate custom document: {job['error']}",
+        )
+    if job["status"] != "completed":
+        return JSONResponse(
+            status_code=202, content={"status": job["status"], "job_id": job_id}
+        )
+
+    return {
+        "status": "success",
+        "timestamp": datetime.fromtimestamp(
+            job["finished_at"], timezone.utc
+        ).isoformat(),
+        "data": job["result"],
+    }
+
+
+@router.post("/api/generate-answer")
+async def handle_answer_generation(request: QueryRequest):
     """
     Handles medical Q&A or conversation-based requests.
     Uses the chat agent pipeline (RAG + LLM).
     """
+    deadline = request_deadline("chat")
     try:
-        print(f"[INFO] 💬 Query received: {request.query}")
-        answer = invoke_chat_agent(request.query, session_id=request.session_id)
-        print("[INFO] ✅ Answer generated successfully.")
+        logger.info("💬 Query received (%d chars)", len(request.query))
+        logger.debug("Query: %s", request.query)
+        answer = await invoke_chat_agent(
+            request.query, session_id=request.session_id, deadline=deadline
+        )
+        logger.info("✅ Answer generated successfully.")
         return {"status": "success", "answer": answer}
 
+    except DeadlineExceeded as e:
+        logger.error("⏱️ Chat agent timed out: %s", e)
+        raise HTTPException(status_code=504, detail=str(e))
+
     except Exception as e:
-        print(f"[ERROR] ❌ Chat agent error: {str(e)}")
+        logger.error("❌ Chat agent error: %s", e)
         raise HTTPException(status_code=500, detail=f"Chat agent error: {str(e)}")
 
 
+@router.post("/api/generate-answer/stream")
+async def handle_answer_generation_stream(request: QueryRequest):
+    """
+    Streaming variant of /api/generate-answer. Emits server-sent events for
+    each pipeline stage, then the answer tokens as they are generated.
+    """
+    logger.info("💬 Streaming query received (%d chars)", len(request.query))
+    deadline = request_deadline("chat")
+
+    async def event_stream():
+        try:
+            async for event in astream_chat_agent(
+                request.query, session_id=request.session_id, deadline=deadline
+            ):
+                yield format_sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error("❌ Chat agent stream error: %s", e)
+            yield format_sse("error", f"Chat agent error: {str(e)}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/api/invalidate-session-cache")
+async def handle_session_cache_invalidation(request: SessionRequest):
+    """Drops cached retrievals after a session transcript is re-ingested."""
+    removed = invalidate_session_contexts(request.session_id)
+    logger.info("🧹 Invalidated %d cached retrievals for session", removed)
+    return {"status": "success", "removed": removed}
+
+
+# ============================================================
+# 🚀 Application Factory
+# ============================================================
+
+
+def warm_up():
+    """
+    Builds the per-worker clients and graphs in dependency order, so the
+    first request doesn't pay for them. Each getter is memoized, so anything
+    skipped here is still built lazily on first use.
+    """
+    started = time.perf_counter()
+    get_rag_client()
+    get_llm_with_tools()  # also creates the shared chat model client
+    get_chat_app()
+    get_document_agent()
+    _startup_stats["warm_up_seconds"] = time.perf_counter() - started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the log writer, builds clients, graphs and pools once per worker,
+    starts the job workers, and releases pooled connections on shutdown.
+    """
+    start_logging()
+    if server_config["startup"]["warm_up"]:
+        warm_up()
+    await job_queue.start()
+    logger.info("🚀 Worker ready (warm-up %.2fs)", _startup_stats["warm_up_seconds"])
+    yield
+    await job_queue.stop()
+    await close_rag_client()
+    stop_logging()
+
+
+def register_metrics_sources():
+    """Exposes every module's stats dict on /metrics."""
+    cache_counters = ("hits", "misses", "evictions", "expirations")
+    register_stats(
+        "dynamic_model_cache", dynamic_model_cache_stats, counters=cache_counters
+    )
+    register_stats(
+        "structured_llm_cache", structured_llm_cache_stats, counters=cache_counters
+    )
+    register_stats("retrieval_cache", retrieval_cache_stats, counters=cache_counters)
+    register_stats(
+        "document_cache",
+        document_cache_stats,
+        counters=[
+            f"{tier}_{key}" for tier in ("memory", "disk") for key in cache_counters
+        ],
+    )
+    register_stats(
+        "query_prefilter",
+        prefilter_stats,
+        counters=("accept", "reject", "uncertain", "total"),
+    )
+    single_flight_counters = ("executions", "coalesced")
+    register_stats(
+        "chat_single_flight", chat_requests.stats, counters=single_flight_counters
+    )
+    register_stats(
+        "document_single_flight",
+        document_requests.stats,
+        counters=single_flight_counters,
+    )
+    register_stats(
+        "long_transcript",
+        long_transcript_stats,
+        counters=(
+            "runs",
+            "chunks",
+            "map_seconds",
+            "reduce_seconds",
+            "input_tokens",
+            "reduce_input_tokens",
+        ),
+    )
+    register_stats(
+        "document_refinement",
+        refinement_stats,
+        counters=("documents", "sections_checked", "sections_refined"),
+    )
+    register_stats(
+        "llm_governor",
+        governor_stats,
+        label="model",
+        counters=(
+            "requests",
+            "estimated_tokens",
+            "actual_tokens",
+            "queue_seconds_total",
+        ),
+    )
+    register_stats(
+        "llm_hedging",
+        lambda: {k: v for k, v in hedging_stats().items() if k != "latency_seconds"},
+        counters=("calls", "hedges", "hedge_wins", "fallbacks"),
+    )
+    register_stats(
+        "llm_live_latency_seconds",
+        lambda: hedging_stats()["latency_seconds"],
+        label=("model", "node"),
+    )
+    register_stats(
+        "deadline",
+        lambda: {
+            stage: {"overruns": count}
+            for stage, count in deadline_overrun_stats().items()
+        },
+        label="stage",
+        counters=("overruns",),
+    )
+    register_stats(
+        "job_queue",
+        job_queue.stats,
+        counters=("submitted", "completed", "failed", "rejected", "wait_seconds_total"),
+    )
+    register_stats("startup", lambda: _startup_stats)
+    register_stats("logging", logging_stats, counters=("dropped",))
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the FastAPI application. Importing this module no longer creates
+    LLM clients or compiles graphs; those are built by the lifespan.
+    """
+    load_dotenv()
+
+    app = FastAPI(title="Clinico AI Backend", version="1.0.0", lifespan=lifespan)
+    register_metrics_sources()
+
+    # API key check, request ids, Server-Timing and access logging in one
+    # pure-ASGI layer (see core/middleware.py)
+    app.add_middleware(
+        ClinicoMiddleware,
+        api_key=os.getenv("CLINICO_AI_API_KEY"),
+        check_api_key=server_config.get("check_api_key", True),
+    )
+    app.include_router(router)
+    return app
+
+
+app = create_app()
+
+
 # ============================================================
 # 🏁 Entry Point
 # ============================================================
 if __name__ == "__main__":
-    print("[INFO] 🚀 Starting Clinico AI backend...")
+    logger.info("🚀 Starting Clinico AI backend...")
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=False)
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import random
+import re
+import time
+
+import httpx
+
+from cofig import server_config
+from core.ttl_cache import TTLCache
+from core.metrics import rag_errors, rag_latency
+from core.logger import get_logger
+
+logger = get_logger("rag_service")
+
+_client: httpx.AsyncClient | None = None
+
+_retrieval_cache = TTLCache(
+    max_entries=server_config["retrieval_cache"]["max_entries"],
+    ttl_seconds=server_config["retrieval_cache"]["ttl_seconds"],
+)
+
+
+def get_rag_client() -> httpx.AsyncClient:
+    """Returns the shared, connection-pooled client for the RAG service."""
+    global _client
+    if _client is None or _client.is_closed:
+        settings = server_config["rag_client"]
+        _client = httpx.AsyncClient(
+            # Read at first use so the app factory's load_dotenv() applies
+            base_url=os.environ.get("RAG_API_URL", "http://localhost:3001"),
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=settings["max_connections"],
+                max_keepalive_connections=settings["max_keepalive_connections"],
+                keepalive_expiry=settings["keepalive_expiry"],
+            ),
+            timeout=httpx.Timeout(
+                settings["read_timeout"], connect=settings["connect_timeout"]
+            ),
+        )
+    return _client
+
+
+async def close_rag_client():
+    """Closes the pooled client. Called from the FastAPI shutdown hook."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases, strips punctuation and collapses whitespace for cache keys."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def invalidate_session_contexts(session_id: str) -> int:
+    """
+    Drops cached retrievals for a session. Call this whenever the session's
+    transcript is re-ingested into the vector store.
+    """
+    return _retrieval_cache.delete_where(lambda key: key[0] == session_id)
+
+
+def retrieval_cache_stats() -> dict:
+    return _retrieval_cache.stats()
+
+
+async def similarity_search(query: str, session_id: str = None) -> list[str]:
+    """
+    Fetches the transcript chunks most similar to the query for a session.
+    Results are cached per (session_id, normalized query) for a short TTL.
+    """
+    cache_key = (session_id, normalize_query(query))
+    contexts = _retrieval_cache.get(cache_key)
+    if contexts is not None:
+        return contexts
+
+    contexts = await _fetch_similar_contexts(query, session_id)
+    _retrieval_cache.set(cache_key, contexts)
+    return contexts
+
+
+async def _fetch_similar_contexts(query: str, session_id: str = None) -> list[str]:
+    """Calls the RAG service, retrying transient failures with jittered backoff."""
+    settings = server_config["rag_client"]
+    payload = {"query": query, "sessionId": session_id}
+
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            response = await get_rag_client().post(
+                "/api/similarity-search/", json=payload
+            )
+            response.raise_for_status()
+            rag_latency.observe(time.perf_counter() - started)
+            return response.json().get("data", [])
+        except Exception as e:
+            rag_errors.inc()
+            if attempt >= settings["max_retries"] or not _is_retryable(e):
+                raise
+            delay = random.uniform(0, settings["backoff_base"] * (2**attempt))
+            attempt += 1
+            logger.warning(
+                "RAG similarity search failed (%r), retry %d in %.2fs",
+                e,
+                attempt,
+                delay,
+            )
+            await asyncio.sleep(delay)
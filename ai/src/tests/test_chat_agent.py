@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.chat_agent import chat_agent
+from core.deadline import DeadlineExceeded, new_deadline
+
+
+class FakeChatModel:
+    """Stands in for the Groq chat model; answers `reply` after `seconds`."""
+
+    model_name = "fake-model"
+
+    def __init__(self, reply, seconds=0.0):
+        self.reply = reply
+        self.seconds = seconds
+        self.finished = 0
+
+    async def ainvoke(self, _messages, config=None):
+        await asyncio.sleep(self.seconds)
+        self.finished += 1
+        return self.reply
+
+
+class RecordingRetrieval:
+    """Stands in for get_relevant_contexts, recording how each call ended."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.events = []
+
+    async def ainvoke(self, _args):
+        self.events.append("started")
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.events.append("cancelled")
+            raise
+        self.events.append("finished")
+        return ["Patient takes lisinopril 10 mg daily."]
+
+
+def _tool_call(query):
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "get_relevant_contexts", "args": {"query": query}, "id": "call_1"}
+        ],
+    )
+
+
+def _inputs(query):
+    return {
+        "messages": [HumanMessage(content=query)],
+        "session_id": "test-session",
+        "context": [],
+    }
+
+
+def test_speculative_refusal_cancels_retrieval_and_tool_decision(monkeypatch):
+    validator = FakeChatModel(AIMessage(content="NO"), seconds=0.01)
+    decision = FakeChatModel(_tool_call("weather"), seconds=0.5)
+    retrieval = RecordingRetrieval(0.5)
+    monkeypatch.setattr(chat_agent, "get_llm", lambda: validator)
+    monkeypatch.setattr(chat_agent, "get_llm_with_tools", lambda: decision)
+    monkeypatch.setattr(chat_agent, "get_relevant_contexts", retrieval)
+    graph = chat_agent.build_chat_graph("speculative")
+
+    async def run():
+        started = time.monotonic()
+        response = await graph.ainvoke(_inputs("Write me a poem about the weather."))
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(0.6)  # long enough for leaked work to finish
+        return response, elapsed
+
+    response, elapsed = asyncio.run(run())
+
+    assert response["messages"][-1].content == "NO"
+    assert elapsed < 0.4
+    assert retrieval.events == ["started", "cancelled"]
+    assert decision.finished == 0
+
+
+def test_fused_refusal_makes_one_call_and_never_retrieves(monkeypatch):
+    triage = FakeChatModel(
+        chat_agent.QueryTriage(
+            is_valid=False, needs_retrieval=True, retrieval_query="weather"
+        )
+    )
+    decision = FakeChatModel(_tool_call("weather"))
+    retrieval = RecordingRetrieval(0)
+    monkeypatch.setattr(chat_agent, "get_structured_llm", lambda *a, **k: triage)
+    monkeypatch.setattr(chat_agent, "get_llm_with_tools", lambda: decision)
+    monkeypatch.setattr(chat_agent, "get_relevant_contexts", retrieval)
+    graph = chat_agent.build_chat_graph("fused")
+
+    response = asyncio.run(graph.ainvoke(_inputs("Write me a poem about the weather.")))
+
+    assert response["messages"][-1].content == "NO"
+    assert triage.finished == 1
+    assert decision.finished == 0
+    assert retrieval.events == []
+
+
+@pytest.fixture
+def serial_chat(monkeypatch):
+    answer = AIMessage(content="The patient takes lisinopril 10 mg daily.")
+    query = "What medication is the patient taking for hypertension?"
+    monkeypatch.setattr(chat_agent, "get_llm", lambda: FakeChatModel(answer))
+    monkeypatch.setattr(
+        chat_agent, "get_llm_with_tools", lambda: FakeChatModel(_tool_call(query))
+    )
+    monkeypatch.setitem(chat_agent.server_config["llm_governor"], "enabled", False)
+    return query
+
+
+def test_slow_retrieval_degrades_to_an_answer_without_context(serial_chat, monkeypatch):
+    monkeypatch.setattr(chat_agent, "get_relevant_contexts", RecordingRetrieval(3))
+    monkeypatch.setitem(
+        chat_agent.server_config["deadlines"], "answer_reserve_seconds", 0.5
+    )
+
+    async def run():
+        return await chat_agent.invoke_chat_agent(
+            serial_chat, "slow-rag-session", new_deadline(1.0)
+        )
+
+    started = time.monotonic()
+    answer = asyncio.run(run())
+
+    assert answer and answer != chat_agent.REFUSAL_MESSAGE
+    assert time.monotonic() - started < 1.0
+
+
+def test_joining_caller_gives_up_at_its_own_deadline(serial_chat, monkeypatch):
+    monkeypatch.setattr(chat_agent, "get_relevant_contexts", RecordingRetrieval(0.5))
+
+    async def run():
+        first = asyncio.create_task(
+            chat_agent.invoke_chat_agent(
+                serial_chat, "joined-session", new_deadline(60)
+            )
+        )
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await chat_agent.invoke_chat_agent(
+                serial_chat, "joined-session", new_deadline(0.1)
+            )
+        waited = time.monotonic() - started
+        return waited, await first
+
+    waited, first_answer = asyncio.run(run())
+
+    assert waited < 0.3
+    assert first_answer  # the shared run was not cancelled
@@ -0,0 +1,214 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.document_agent import document_agent
+from agents.document_agent.document_cache import get_cached_document
+from core.deadline import DeadlineExceeded
+from core.model.hedging import resilient_ainvoke
+from core.model.llm_schemas import DocumentField, create_dynamic_model
+
+SoapModel = create_dynamic_model(
+    [
+        DocumentField(label="subjective", description="Patient-reported history"),
+        DocumentField(label="plan", description="Treatment plan"),
+    ],
+    "DynamicTestSoapModel",
+)
+
+
+class FakeTool:
+    """Stands in for generate_custom_document_tool."""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def ainvoke(self, _args):
+        return self.result
+
+
+class FakeRefiner:
+    calls = 0
+
+    async def ainvoke(self, _messages, config=None):
+        FakeRefiner.calls += 1
+        return SoapModel(subjective="refined", plan="refined")
+
+
+@pytest.fixture
+def refiner(monkeypatch):
+    FakeRefiner.calls = 0
+    monkeypatch.setitem(document_agent.server_config["llm_governor"], "enabled", False)
+    monkeypatch.setattr(
+        document_agent, "get_structured_llm", lambda *a, **k: FakeRefiner()
+    )
+    return FakeRefiner
+
+
+def _run(transcript):
+    return asyncio.run(
+        document_agent.invoke_document_agent(transcript, SoapModel, "soap", "")
+    )
+
+
+def _cached(transcript):
+    key = document_agent._cache_key(transcript, SoapModel, "soap", "")
+    return asyncio.run(get_cached_document(key, SoapModel))
+
+
+def test_failed_generation_raises_and_is_not_cached(monkeypatch, refiner):
+    monkeypatch.setattr(
+        document_agent,
+        "generate_custom_document_tool",
+        FakeTool({"error": "rate limited"}),
+    )
+    transcript = "failed generation transcript"
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        _run(transcript)
+
+    assert refiner.calls == 0
+    assert _cached(transcript) is None
+
+
+def test_successful_generation_is_refined_and_cached(monkeypatch, refiner):
+    monkeypatch.setattr(
+        document_agent,
+        "generate_custom_document_tool",
+        FakeTool(SoapModel(subjective="draft", plan="draft")),
+    )
+    transcript = "successful generation transcript"
+
+    document = _run(transcript)
+
+    assert document.subjective == "refined"
+    assert _cached(transcript) == document
+
+
+class FixedModel:
+    def __init__(self, result):
+        self.result = result
+
+    async def ainvoke(self, _llm_input, config=None):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class FallbackTool(FakeTool):
+    """Generates the draft the way generate_document does, on the fallback tier."""
+
+    async def ainvoke(self, _args):
+        return await resilient_ainvoke(
+            "primary-model",
+            FixedModel(RuntimeError("primary unavailable")),
+            "prompt",
+            fallback=("fallback-model", FixedModel(self.result)),
+        )
+
+
+def test_document_from_the_fallback_tier_is_not_cached(monkeypatch, refiner):
+    monkeypatch.setattr(
+        document_agent,
+        "generate_custom_document_tool",
+        FallbackTool(SoapModel(subjective="draft", plan="draft")),
+    )
+    transcript = "fallback generation transcript"
+
+    document = _run(transcript)
+
+    assert document.subjective == "refined"
+    assert _cached(transcript) is None
+
+
+class SlowRefiner(FakeRefiner):
+    async def ainvoke(self, _messages, config=None):
+        await asyncio.sleep(1)
+        return await super().ainvoke(_messages, config)
+
+
+def test_draft_returned_after_refinement_timeout_is_not_cached(monkeypatch):
+    monkeypatch.setitem(document_agent.server_config["llm_governor"], "enabled", False)
+    monkeypatch.setattr(
+        document_agent, "get_structured_llm", lambda *a, **k: SlowRefiner()
+    )
+    monkeypatch.setattr(
+        document_agent,
+        "generate_custom_document_tool",
+        FakeTool(SoapModel(subjective="draft", plan="draft")),
+    )
+    transcript = "refinement timeout transcript"
+
+    async def run():
+        deadline = time.monotonic() + 0.2
+        return await document_agent.invoke_document_agent(
+            transcript, SoapModel, "soap", "", deadline
+        )
+
+    document = asyncio.run(run())
+
+    assert document.subjective == "draft"
+    assert _cached(transcript) is None
+
+
+def test_joining_caller_gives_up_at_its_own_deadline(monkeypatch, refiner):
+    class SlowTool(FakeTool):
+        async def ainvoke(self, _args):
+            await asyncio.sleep(0.5)
+            return self.result
+
+    monkeypatch.setattr(
+        document_agent,
+        "generate_custom_document_tool",
+        SlowTool(SoapModel(subjective="draft", plan="draft")),
+    )
+    transcript = "joined request transcript"
+
+    async def run():
+        job = asyncio.create_task(
+            document_agent.invoke_document_agent(
+                transcript, SoapModel, "soap", "", time.monotonic() + 600
+            )
+        )
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await document_agent.invoke_document_agent(
+                transcript, SoapModel, "soap", "", time.monotonic() + 0.1
+            )
+        waited = time.monotonic() - started
+        return waited, await job
+
+    waited, document = asyncio.run(run())
+
+    assert waited < 0.3
+    assert document.subjective == "refined"  # the shared run kept going
+
+
+def test_queued_job_does_not_join_a_synchronous_run(monkeypatch, refiner):
+    calls = []
+
+    class CountingTool(FakeTool):
+        async def ainvoke(self, _args):
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return self.result
+
+    monkeypatch.setattr(
+        document_agent,
+        "generate_custom_document_tool",
+        CountingTool(SoapModel(subjective="draft", plan="draft")),
+    )
+
+    async def run():
+        await asyncio.gather(
+            document_agent.invoke_document_agent("job transcript", SoapModel, "soap"),
+            document_agent.invoke_document_agent(
+                "job transcript", SoapModel, "soap", budget="job_document"
+            ),
+        )
+
+    asyncio.run(run())
+
+    assert len(calls) == 2  # each ran under its own budget
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from core.model import governor
+from core.model.governor import ModelGovernor, TokenBucket, governed_ainvoke
+
+
+class UsageReportingModel(FakeListChatModel):
+    """Fake chat model that reports usage the way ChatGroq does."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(
+            content="YES",
+            response_metadata={"model_name": "test-model"},
+            usage_metadata={"input_tokens": 40, "output_tokens": 1, "total_tokens": 41},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def fresh_governor(monkeypatch):
+    test_governor = ModelGovernor(
+        requests_per_minute=60, tokens_per_minute=6000, max_concurrency=4
+    )
+    monkeypatch.setitem(governor.server_config["llm_governor"], "enabled", True)
+    monkeypatch.setattr(governor, "_governors", {"test-model": test_governor})
+    monkeypatch.setattr(governor, "_completion_estimates", {})
+    return test_governor
+
+
+def test_bucket_waits_for_refill_and_caps_refunds():
+    bucket = TokenBucket(per_minute=60)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+    bucket.adjust(-1000)  # refund more than was ever charged
+    assert bucket.available == pytest.approx(60, abs=0.1)
+
+
+def test_reported_usage_settles_the_estimate(fresh_governor):
+    model = UsageReportingModel(responses=[])
+    fresh_governor.tokens.rate = 0  # only charges and refunds move the balance
+
+    response = asyncio.run(governed_ainvoke("test-model", model, "Is this valid?"))
+
+    assert response.content == "YES"
+    stats = fresh_governor.stats
+    assert stats["actual_tokens"] == 41
+    # The flat 512-token completion guess was refunded down to real usage
+    assert fresh_governor.tokens.available == pytest.approx(6000 - 41)
+
+
+class LongPromptModel(UsageReportingModel):
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(
+            content="note",
+            response_metadata={"model_name": "test-model"},
+            usage_metadata={
+                "input_tokens": 11000,
+                "output_tokens": 600,
+                "total_tokens": 11600,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_call_larger_than_the_bucket_is_charged_in_full(fresh_governor):
+    fresh_governor.tokens.rate = 0
+    prompt = "x" * 44000  # ~11,000 tokens estimated, bucket holds 6,000
+
+    asyncio.run(governed_ainvoke("test-model", LongPromptModel(responses=[]), prompt))
+
+    assert fresh_governor.tokens.available == pytest.approx(6000 - 11600)
+
+
+def test_completion_estimate_is_learned_per_model_and_node(fresh_governor):
+    model = UsageReportingModel(responses=[])
+
+    async def run():
+        await governed_ainvoke("test-model", model, "Is this valid?")
+        return fresh_governor.stats["estimated_tokens"]
+
+    first = asyncio.run(run())
+    second = asyncio.run(run()) - first
+
+    assert second < first  # 1-token verdicts stop being charged 512 tokens
+    assert governor._completion_estimates[("test-model", "none")] == 1
+
+
+def test_parent_run_still_sees_governed_calls(fresh_governor):
+    model = UsageReportingModel(responses=[], disable_streaming=True)
+
+    async def node(_state):
+        return await governed_ainvoke("test-model", model, "Is this valid?")
+
+    async def run():
+        return [
+            event["event"]
+            async for event in RunnableLambda(node).astream_events({}, version="v2")
+        ]
+
+    # The usage handler is added to the inherited callbacks, not swapped in
+    assert "on_chat_model_end" in asyncio.run(run())
+    assert fresh_governor.stats["actual_tokens"] == 41
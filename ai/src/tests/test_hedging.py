@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from core.model import governor, hedging
+from core.model.governor import ModelGovernor
+from core.model.hedging import resilient_ainvoke
+
+
+class SleepyModel:
+    """Runnable that takes `seconds` at the "provider"."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+
+    async def ainvoke(self, _llm_input, config=None):
+        self.calls += 1
+        await asyncio.sleep(self.seconds)
+        return "done"
+
+
+@pytest.fixture
+def single_slot_governor(monkeypatch):
+    """Governor that admits one call at a time, so the second one queues."""
+    monkeypatch.setitem(governor.server_config["llm_governor"], "enabled", True)
+    monkeypatch.setattr(
+        governor,
+        "_governors",
+        {"test-model": ModelGovernor(6000, 1_000_000, max_concurrency=1)},
+    )
+    monkeypatch.setattr(hedging, "_histograms", {})
+    monkeypatch.setitem(hedging._stats, "hedges", 0)
+
+
+def test_latency_histogram_excludes_governor_queue_time(single_slot_governor):
+    async def run():
+        await asyncio.gather(
+            resilient_ainvoke("test-model", SleepyModel(0.3), "blocker"),
+            resilient_ainvoke("test-model", SleepyModel(0.05), "queued"),
+        )
+
+    asyncio.run(run())
+
+    samples = sorted(hedging._histograms[("test-model", "none")]._samples)
+    assert samples[0] == pytest.approx(0.05, abs=0.04)  # not 0.35
+
+
+def test_no_hedge_while_the_primary_is_still_queued(single_slot_governor, monkeypatch):
+    settings = hedging.server_config["llm_hedging"]
+    monkeypatch.setitem(settings, "hedging_enabled", True)
+    histogram = hedging.get_histogram("test-model")
+    for _ in range(settings["min_samples"]):
+        histogram.record(0.05)  # p95 hedge delay of 50 ms
+    queued = SleepyModel(0.01)
+
+    async def run():
+        await asyncio.gather(
+            # Holds the only slot for 300 ms without being hedged itself
+            governor.governed_ainvoke("test-model", SleepyModel(0.3), "blocker"),
+            resilient_ainvoke("test-model", queued, "queued"),
+        )
+
+    asyncio.run(run())
+
+    assert queued.calls == 1
+    assert hedging._stats["hedges"] == 0
+
+
+def test_histograms_are_kept_per_model_and_node(monkeypatch):
+    monkeypatch.setattr(hedging, "_histograms", {})
+    monkeypatch.setitem(governor.server_config["llm_governor"], "enabled", False)
+
+    async def run(node, seconds):
+        token = hedging.current_node.set(node)
+        try:
+            await resilient_ainvoke("test-model", SleepyModel(seconds), "x")
+        finally:
+            hedging.current_node.reset(token)
+
+    asyncio.run(run("query_validator", 0.01))
+    asyncio.run(run("document_quality_checker", 0.1))
+
+    assert set(hedging._histograms) == {
+        ("test-model", "query_validator"),
+        ("test-model", "document_quality_checker"),
+    }
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from jobs import JobQueue, JobQueueFull
+
+
+async def _generate():
+    return "document"
+
+
+def test_submit_beyond_capacity_is_rejected():
+    async def run():
+        queue = JobQueue(max_size=1, workers=0, retention_seconds=60)
+        await queue.start()
+        queue.submit(_generate)
+        with pytest.raises(JobQueueFull):
+            queue.submit(_generate)
+        return queue.stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["submitted"] == 1
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 1
+
+
+def test_finished_results_expire_after_retention():
+    async def run():
+        queue = JobQueue(max_size=10, workers=1, retention_seconds=0.1)
+        await queue.start()
+        job_id = queue.submit(_generate)
+        await queue._queue.join()
+        finished = dict(queue.get(job_id))
+        await asyncio.sleep(0.15)
+        expired = queue.get(job_id)
+        await queue.stop()
+        return finished, expired
+
+    finished, expired = asyncio.run(run())
+
+    assert finished["status"] == "completed"
+    assert finished["result"] == "document"
+    assert expired is None
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from agents.chat_agent import chat_agent
+from agents.document_agent import document_agent
+from benchmarks import load_test, stub_llm
+from benchmarks.stub_llm import StubChatGroq
+from cofig import server_config
+from core.model import governor, model
+from core.model.llm_schemas import DocumentField, create_dynamic_model
+
+
+def _clear_clients():
+    chat_agent.get_llm.cache_clear()
+    chat_agent.get_llm_with_tools.cache_clear()
+
+
+@pytest.fixture
+def stub_backends(monkeypatch):
+    """Fresh clients and governors, undoing the patches the load test makes."""
+    _clear_clients()
+    monkeypatch.setattr(model, "ChatGroq", model.ChatGroq)
+    for name in ("first_token_seconds", "tokens_per_second"):
+        monkeypatch.setattr(stub_llm.profile, name, getattr(stub_llm.profile, name))
+    monkeypatch.setattr(model, "_chat_models", {})
+    monkeypatch.setattr(model, "_structured_llms", type(model._structured_llms)())
+    monkeypatch.setattr(governor, "_governors", {})
+    monkeypatch.setattr(governor, "_completion_estimates", {})
+    monkeypatch.setitem(server_config["llm_governor"], "enabled", True)
+    monkeypatch.setitem(server_config, "chat_pipeline", "serial")
+    monkeypatch.setenv("RAG_API_URL", "")
+    yield
+    _clear_clients()
+
+
+def test_every_scenario_completes_without_errors_under_the_governor(
+    stub_backends, capsys
+):
+    args = load_test.parse_args(
+        ["--requests", "2", "--concurrency", "2", "--llm-latency", "0.02"]
+    )
+
+    exit_code = asyncio.run(load_test.main(args))
+
+    report = capsys.readouterr().out
+    assert exit_code == 0, report
+    for name in load_test.SCENARIOS:
+        assert name in report
+
+
+def test_latency_budget_overrun_fails_the_run(stub_backends, capsys):
+    args = load_test.parse_args(
+        ["--scenario", "chat", "--requests", "1", "--max-p95-ms", "1"]
+    )
+
+    assert asyncio.run(load_test.main(args)) == 1
+    assert "over the 1.0 ms budget" in capsys.readouterr().out
+
+
+class RunLabellingStub(StubChatGroq):
+    """Fills structured fields with the kind of run that wrote them."""
+
+    def _reply(self, messages, tools=None, tool_choice=None):
+        reply = super()._reply(messages, tools, tool_choice)
+        run = "map" if "CONVERSATION PART" in str(messages[-1].content) else "reduce"
+        for call in reply.tool_calls:
+            call["args"] = {name: run for name in call["args"]}
+        return reply
+
+
+def test_document_stream_emits_only_reduce_sections_for_long_transcripts(
+    stub_backends, monkeypatch
+):
+    # Per-chunk map runs would otherwise leak partial sections to clients
+    monkeypatch.setitem(server_config["llm_governor"], "enabled", False)
+    monkeypatch.setattr(stub_llm.profile, "first_token_seconds", 0.0)
+    monkeypatch.setattr(stub_llm.profile, "tokens_per_second", 1e6)
+    monkeypatch.setattr(model, "ChatGroq", RunLabellingStub)
+    fields = [
+        DocumentField(**field)
+        for field in load_test.SOAP_FIELDS
+        if field["label"] in ("subjective", "plan")
+    ]
+    custom_model = create_dynamic_model(fields, "DynamicStreamSoapModel")
+    transcript = load_test.TRANSCRIPT * 250  # ~20k tokens, several map chunks
+
+    async def run():
+        return [
+            event
+            async for event in document_agent.astream_document_agent(
+                transcript, custom_model, "soap", ""
+            )
+        ]
+
+    events = asyncio.run(run())
+
+    sections = {
+        e["data"]["label"]: e["data"]["content"]
+        for e in events
+        if e["event"] == "section"
+    }
+    assert sections == {"subjective": "reduce", "plan": "reduce"}
+    assert events[-1]["event"] == "done"
+
+
+def test_document_stream_parses_arguments_only_when_a_section_can_complete(
+    stub_backends, monkeypatch
+):
+    monkeypatch.setitem(server_config["llm_governor"], "enabled", False)
+    monkeypatch.setattr(stub_llm.profile, "first_token_seconds", 0.0)
+    monkeypatch.setattr(stub_llm.profile, "tokens_per_second", 1e6)
+    monkeypatch.setattr(model, "ChatGroq", StubChatGroq)
+    parses = []
+    parse = document_agent.parse_partial_json
+    monkeypatch.setattr(
+        document_agent,
+        "parse_partial_json",
+        lambda text: parses.append(text) or parse(text),
+    )
+    fields = [
+        DocumentField(label=f"section_{i}", description=f"Section {i}")
+        for i in range(20)
+    ]
+    custom_model = create_dynamic_model(fields, "DynamicTwentySectionModel")
+
+    async def run():
+        return [
+            event
+            async for event in document_agent.astream_document_agent(
+                "Patient reports a dry cough.", custom_model, "long", ""
+            )
+        ]
+
+    events = asyncio.run(run())
+
+    assert sum(e["event"] == "section" for e in events) == 20
+    # Four quotes per string field; the ~40-token values stream in many chunks
+    assert len(parses) <= 4 * 20 + 2
@@ -0,0 +1,27 @@
+import logging
+import queue
+
+from core import logger
+from core.logger import DroppingQueueHandler
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking(monkeypatch):
+    monkeypatch.setitem(logger._stats, "dropped", 0)
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    test_logger = logging.getLogger("clinico.test_logger")
+    test_logger.addHandler(handler)
+    try:
+        for index in range(5):
+            test_logger.warning("record %d", index)
+    finally:
+        test_logger.removeHandler(handler)
+
+    assert handler.queue.qsize() == 2
+    assert logger.logging_stats() == {"dropped": 3}
+
+
+def test_get_logger_starts_no_thread():
+    logger.get_logger("fork_safety")
+
+    # The writer thread is started by the app lifespan, after any fork
+    assert logger._listener is None
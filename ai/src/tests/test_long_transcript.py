@@ -0,0 +1,40 @@
+from agents.document_agent.tools.long_transcript import chunk_transcript
+from core.model.tokens import estimate_tokens
+
+SENTENCE = "Patient reports a dry cough that is worse at night and after exercise. "
+
+
+def test_single_line_transcript_is_split_on_sentences():
+    # Speech-to-text returns the whole consultation as one line
+    transcript = SENTENCE * 6000  # ~110k characters, ~27.7k tokens
+
+    chunks = chunk_transcript(transcript, chunk_tokens=4000, overlap_tokens=200)
+
+    assert len(chunks) >= 7
+    assert all(estimate_tokens(chunk) <= 4000 + 200 for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_sentence_longer_than_a_chunk_falls_back_to_character_windows():
+    transcript = "word " * 10000  # no sentence punctuation at all
+
+    chunks = chunk_transcript(transcript, chunk_tokens=1000, overlap_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 1000 + 100 for chunk in chunks)
+
+
+def test_chunks_overlap_and_keep_every_line():
+    lines = [f"Line {i}: the patient answered question {i}." for i in range(400)]
+
+    chunks = chunk_transcript("\n".join(lines), chunk_tokens=500, overlap_tokens=50)
+
+    assert len(chunks) > 1
+    assert chunks[1].splitlines()[0] in chunks[0]
+    assert all(any(line in chunk for chunk in chunks) for line in lines)
+
+
+def test_short_transcript_is_one_chunk():
+    assert chunk_transcript(SENTENCE, chunk_tokens=4000, overlap_tokens=200) == [
+        SENTENCE
+    ]
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from jobs import JobQueue
+
+VALID_FIELDS = [{"label": "plan", "description": "Treatment plan"}]
+# Pydantic refuses underscore-prefixed field names when building the model
+INVALID_FIELDS = [{"label": "_private", "description": "Not a valid field name"}]
+
+
+def _post(path, payload):
+    async def run():
+        transport = httpx.ASGITransport(app=main.create_app())
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.post(path, json=payload)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def generated_batch(monkeypatch):
+    batches = []
+
+    async def fake_batch(transcript, documents, deadline=None):
+        batches.append(documents)
+        return [document["custom_model"](plan="rest") for document in documents]
+
+    monkeypatch.setattr(main, "invoke_document_agent_batch", fake_batch)
+    return batches
+
+
+def test_bad_template_fails_only_its_own_batch_entry(generated_batch):
+    response = _post(
+        "/api/generate-custom-documents/batch",
+        {
+            "transcript": "Patient reports a cough.",
+            "documents": [
+                {"document_type": "broken", "fields": INVALID_FIELDS},
+                {"document_type": "soap", "fields": VALID_FIELDS},
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [entry["status"] for entry in data] == ["error", "success"]
+    assert data[0]["document_type"] == "BROKEN"
+    assert data[1]["generated_document"] == {"plan": "rest"}
+    assert [d["document_type"] for d in generated_batch[0]] == ["soap"]
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/api/generate-custom-document/stream", "/api/jobs/generate-custom-document"],
+)
+def test_bad_template_is_a_client_error(path):
+    response = _post(
+        path,
+        {
+            "transcript": "Patient reports a cough.",
+            "document_type": "broken",
+            "fields": INVALID_FIELDS,
+            "doctor_suggestions": "",
+        },
+    )
+
+    assert response.status_code == 400
+    assert "Invalid document template" in response.json()["detail"]
+
+
+def test_full_job_queue_responds_with_429(monkeypatch):
+    queue = JobQueue(max_size=1, workers=0, retention_seconds=60)
+    asyncio.run(queue.start())
+    monkeypatch.setattr(main, "job_queue", queue)
+    payload = {
+        "transcript": "Patient reports a cough.",
+        "document_type": "soap",
+        "fields": VALID_FIELDS,
+        "doctor_suggestions": "",
+    }
+
+    accepted = _post("/api/jobs/generate-custom-document", payload)
+    rejected = _post("/api/jobs/generate-custom-document", payload)
+
+    assert accepted.status_code == 202
+    assert rejected.status_code == 429
+    assert "full" in rejected.json()["detail"]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+import main
+from core.deadline import DeadlineExceeded, with_deadline
+from core.metrics import register_stats, render_metrics
+
+
+def test_monotonic_stats_are_exported_as_counters():
+    register_stats(
+        "test_cache",
+        lambda: {"hits": 3, "size": 2, "disk": {"hits": 1}},
+        counters=("hits", "disk_hits"),
+    )
+
+    lines = render_metrics().splitlines()
+
+    assert "# TYPE clinico_test_cache_hits_total counter" in lines
+    assert "clinico_test_cache_hits_total 3" in lines
+    assert "clinico_test_cache_disk_hits_total 1" in lines
+    assert "# TYPE clinico_test_cache_size gauge" in lines
+    assert "clinico_test_cache_size 2" in lines
+
+
+def test_counters_already_named_total_keep_their_name():
+    register_stats(
+        "test_queue",
+        lambda: {"wait_seconds_total": 1.5},
+        counters=("wait_seconds_total",),
+    )
+
+    lines = render_metrics().splitlines()
+
+    assert "# TYPE clinico_test_queue_wait_seconds_total counter" in lines
+
+
+def test_deadline_overruns_are_labelled_by_stage():
+    main.register_metrics_sources()
+
+    async def overrun():
+        await with_deadline("test_stage", 0, asyncio.sleep(0))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(overrun())
+
+    metrics = render_metrics()
+    assert "# TYPE clinico_deadline_overruns_total counter" in metrics
+    assert 'clinico_deadline_overruns_total{stage="test_stage"} 1' in metrics
+    assert "clinico_deadline_overruns_test_stage" not in metrics
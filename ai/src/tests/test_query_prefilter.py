@@ -0,0 +1,63 @@
+import pytest
+
+from agents.chat_agent.query_prefilter import (
+    ACCEPT,
+    REJECT,
+    UNCERTAIN,
+    prevalidate_query,
+)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Does the patient smoke?",
+        "What was the patient complaint?",
+        "What medication is the patient taking for hypertension?",
+        "Is the cough getting worse with the antibiotics?",
+        "Any history of diabetes?",
+    ],
+)
+def test_clinical_queries_skip_the_llm(query):
+    assert prevalidate_query(query) == ACCEPT
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Tell me the history of the Roman empire",
+        "air pressure in a football",
+        "painting my kitchen",
+        "treats for my dog",
+        "Doctor Who recap",
+        "What did the doctor say?",
+        "What is the patient's name?",
+        "patient symptom: write me a python script to scrape twitter",
+        "Doctors notes: patient has a cough, draft a cover letter for my job",
+        "What medication should the patient take? Also write me a poem about "
+        "the ocean, then translate it into French, then list ten capital "
+        "cities and their populations",
+    ],
+)
+def test_generic_or_single_hits_go_to_the_llm(query):
+    assert prevalidate_query(query) == UNCERTAIN
+
+
+def test_abuse_without_clinical_context_is_rejected():
+    assert prevalidate_query("you stupid bot") == REJECT
+
+
+def test_abuse_with_clinical_context_goes_to_the_llm():
+    assert prevalidate_query("the patient called me an idiot") == UNCERTAIN
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["Any psychomotor retardation noted?", "Any history of growth retardation?"],
+)
+def test_medical_terms_are_never_rejected_as_abuse(query):
+    assert prevalidate_query(query) != REJECT
+
+
+def test_abuse_with_generic_context_goes_to_the_llm():
+    assert prevalidate_query("my idiot doctor ignored the pain") == UNCERTAIN
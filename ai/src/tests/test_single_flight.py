@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert calls == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_every_waiter_receives_the_same_exception():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    async def run():
+        return await asyncio.gather(
+            flight.run("key", work), flight.run("key", work), return_exceptions=True
+        )
+
+    first, second = asyncio.run(run())
+    assert isinstance(first, ValueError) and first is second
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def run():
+        impatient = asyncio.ensure_future(flight.run("key", work))
+        patient = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(run()) == "answer"
+
+
+def test_finished_key_runs_again():
+    flight = SingleFlight()
+
+    async def work():
+        return "answer"
+
+    async def run():
+        await flight.run("key", work)
+        await flight.run("key", work)
+
+    asyncio.run(run())
+    assert flight.stats()["executions"] == 2
@@ -0,0 +1,40 @@
+from core import ttl_cache
+from core.ttl_cache import TTLCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=10, ttl_seconds=30)
+    cache.set("key", "value")
+
+    now[0] += 29
+    assert cache.get("key") == "value"
+    now[0] += 2
+    assert cache.get("key", "missing") == "missing"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+    assert stats["size"] == 0 and stats["hit_rate"] == 0.5
+
+
+def test_delete_where_removes_matching_keys():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.set(("s1", "cough"), "docs")
+    cache.set(("s1", "fever"), "docs")
+    cache.set(("s2", "cough"), "docs")
+
+    assert cache.delete_where(lambda key: key[0] == "s1") == 2
+    assert cache.stats()["size"] == 1
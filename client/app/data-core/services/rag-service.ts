@@ -8,9 +8,37 @@ export class RAGService {
             body: JSON.stringify({ transcript, sessionId }),
         });
         const data = await response.json() as { status: string; message: string };
+
+        // Drop retrievals the AI server cached for the previous transcript
+        await RAGService.invalidateSessionCache(sessionId);
+
         return { status: data.status, message: data.message };
     }
 
+    // Best effort: cached retrievals also expire on their own, so an AI server
+    // outage must not fail the vector store update that triggered this
+    private static async invalidateSessionCache(sessionId: string): Promise<void> {
+        try {
+            const response = await fetch(`${process.env.AI_URL}/api/invalidate-session-cache`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    "CLINICO_AI_API_KEY": process.env.CLINICO_AI_API_KEY!,
+                },
+                body: JSON.stringify({ session_id: sessionId }),
+            });
+
+            if (!response.ok) {
+                console.error("Error invalidating session cache:", {
+                    sessionId,
+                    status: response.status,
+                });
+            }
+        } catch (error) {
+            console.error("Error invalidating session cache:", error);
+        }
+    }
+
     static async askQuestion(query: string, sessionId?: string): Promise<{ status: string; answer: string }> {
         // Second call to generate answer
         const response2 = await fetch(`${process.env.AI_URL}/api/generate-answer`, {
@@ -43,6 +71,8 @@ export class RAGService {
         if (!response.ok) {
             throw new Error('Failed to delete vector store data');
         }
+
+        await RAGService.invalidateSessionCache(sessionId);
         return { status: 'success' };
     }
 